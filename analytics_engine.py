@@ -3,15 +3,559 @@ Advanced Analytics Engine for Sales Data
 Handles complex analytics, predictions, and business intelligence
 """
 
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
+from data_processor import MEASURE_COLS
+from sketches import SKETCH_PRECISION, hash_values, hll_registers, hll_estimate
 import warnings
 warnings.filterwarnings('ignore')
 
+# Dimensions of the dashboard cube: the sidebar filters plus the columns charts break sales down by
+CUBE_DIMENSIONS = ['PRODUCTLINE', 'TERRITORY', 'DEALSIZE', 'CUSTOMER_SEGMENT', 'STATUS']
+ROW_COUNT = 'ROWS'
+# Sidebar filter dimensions, indexed by FilterIndex
+FILTER_DIMENSIONS = ['PRODUCTLINE', 'TERRITORY', 'DEALSIZE', 'CUSTOMER_SEGMENT']
+# High-cardinality columns the dashboard groups selected rows by
+GROUP_COLUMNS = ['CUSTOMERNAME', 'PRODUCTCODE', 'COUNTRY']
+# Filter combinations whose row selections are kept
+FILTER_CACHE_SIZE = 32
+# Distinct-count rollups (a calendar grain and the restricted dimensions) kept built
+ROLLUP_CACHE_SIZE = 8
+# Calendar levels derived from the cube's day column
+CALENDAR_LEVELS = {
+    'MONTH': lambda days: days.dt.to_period('M'),
+    'QTR_ID': lambda days: days.dt.quarter,
+    'YEAR_ID': lambda days: days.dt.year
+}
+
+
+def filter_key(start=None, end=None, filters=None):
+    """Hashable key of a sidebar filter state; the order of chosen values does not matter"""
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    chosen = tuple(sorted(
+        (col, tuple(sorted({'' if pd.isna(value) else str(value) for value in values})))
+        for col, values in (filters or {}).items()
+    ))
+    return start, end, chosen
+
+
+def cell_mask(cells, start=None, end=None, filters=None):
+    """Boolean mask of cube cells dated from start to end (inclusive) whose dimensions take one
+    of the allowed values; filters maps a dimension to its allowed values"""
+    mask = np.ones(len(cells), dtype=bool)
+    if start is not None:
+        mask &= (cells['DAY'] >= pd.to_datetime(start)).to_numpy()
+    if end is not None:
+        mask &= (cells['DAY'] <= pd.to_datetime(end)).to_numpy()
+    for col, values in (filters or {}).items():
+        mask &= cells[col].isin(values).to_numpy()
+    return mask
+
+
+class LRUCache:
+    """Most recently used results by key; safe to share between sessions"""
+    def __init__(self, max_entries=FILTER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def values(self):
+        with self._lock:
+            return list(self._entries.values())
+
+
+class SalesCube:
+    """Additive sales measures pre-aggregated per order day and dimension combination.
+
+    Built once from the processed frame. Charts and KPIs select and roll up the cells instead
+    of grouping the raw rows, so their cost depends on the number of occupied cells, not on
+    the row count. Every measure is a sum (plus a row count), so any selection or rollup is exact.
+    """
+    def __init__(self, df=None, dims=CUBE_DIMENSIONS, date_col='ORDERDATE'):
+        self.dims = list(dims)
+        self.date_col = date_col
+        self.cells = None
+        self._selections = LRUCache()
+        if df is not None:
+            self.update(df)
+
+    def _aggregate(self, df):
+        dims = [col for col in self.dims if col in df.columns]
+        measures = [col for col in MEASURE_COLS if col in df.columns]
+        keys = [df[self.date_col].dt.normalize().rename('DAY')] + [df[col] for col in dims]
+        values = df[measures].assign(**{ROW_COUNT: 1})
+        return values.groupby(keys, observed=True, dropna=False).sum().reset_index()
+
+    def update(self, df):
+        """Fold rows into the cube; cells of days and combinations already present are added up"""
+        cells = self._aggregate(df)
+        if self.cells is not None:
+            cells = pd.concat([self.cells, cells], ignore_index=True)
+            keys = ['DAY'] + [col for col in self.dims if col in cells.columns]
+            cells = cells.groupby(keys, observed=True, dropna=False).sum().reset_index()
+        self.cells = cells
+        self.dims = [col for col in self.dims if col in cells.columns]
+        self._selections = LRUCache()
+        return self
+
+    def clear_cache(self):
+        """Forget the cached selections"""
+        self._selections.clear()
+
+    def select(self, start=None, end=None, filters=None):
+        """Cells matching the filter state, as selected by cell_mask"""
+        key = filter_key(start, end, filters)
+        cached = self._selections.get(key)
+        if cached is not None:
+            return cached
+        return self._selections.put(key, self.cells[cell_mask(self.cells, start, end, filters)])
+
+    def rollup(self, cells, by, measures='SALES'):
+        """Sum measures of the selected cells per value of a dimension or calendar level
+        ('MONTH', 'QTR_ID', 'YEAR_ID')"""
+        keys = CALENDAR_LEVELS[by](cells['DAY']).rename(by) if by in CALENDAR_LEVELS else cells[by]
+        return cells.groupby(keys, observed=True)[measures].sum()
+
+    @staticmethod
+    def totals(cells):
+        """Sum of every measure over the selected cells, with the row count under ROWS"""
+        return cells.drop(columns='DAY').sum(numeric_only=True)
+
+    def nbytes(self):
+        return int(self.cells.memory_usage(deep=True).sum()) if self.cells is not None else 0
+
+
+def _compact(values, limit):
+    """values as the narrowest integer dtype that holds numbers up to limit"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if limit < np.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+class FilterIndex:
+    """Row selections for the sidebar filters without scanning or copying the frame.
+
+    Every filter dimension is stored as integer codes plus the sorted row positions of each
+    value, and the order dates as a sorted array with the matching row positions. A selection
+    starts from the smallest candidate set (a date range or a dimension's chosen values) and
+    checks only those rows against the other filters. Selections are arrays of row positions,
+    kept for the most recent filter combinations; sum_by aggregates them with bincount over
+    the stored codes.
+    """
+    def __init__(self, df, dims=FILTER_DIMENSIONS, group_cols=GROUP_COLUMNS, measures=MEASURE_COLS,
+                 date_col='ORDERDATE', cache_size=FILTER_CACHE_SIZE):
+        self.n_rows = len(df)
+        self.dims = [col for col in dims if col in df.columns]
+        self.codes = {}
+        self.values = {}
+        self.options = {}
+        self.value_rows = {}
+        self.value_bounds = {}
+        for col in self.dims + [col for col in group_cols if col in df.columns and col not in dims]:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            # Missing values get the code after the last value, so lookup tables can reject them
+            codes[codes < 0] = len(uniques)
+            self.codes[col] = _compact(codes, len(uniques) + 1)
+            self.values[col] = pd.Index(uniques, name=col)
+        for col in self.dims:
+            codes = self.codes[col]
+            order = np.argsort(codes, kind='stable')
+            self.value_rows[col] = _compact(order, self.n_rows)
+            self.value_bounds[col] = np.searchsorted(codes[order], np.arange(len(self.values[col]) + 2))
+            # Sidebar options in order of first appearance, as Series.unique() lists them,
+            # including a missing value when there is one
+            bounds = self.value_bounds[col]
+            options = self.values[col].tolist()
+            first_rows = list(order[bounds[:-2]])
+            if bounds[-1] > bounds[-2]:
+                options.append(np.nan)
+                first_rows.append(order[bounds[-2]])
+            self.options[col] = [options[i] for i in np.argsort(first_rows)]
+
+        dates = df[date_col].to_numpy(dtype='datetime64[ns]')
+        # NaT sorts last, so it is never inside a searched range
+        date_order = np.argsort(dates, kind='stable')
+        self.dates = dates
+        self.date_rows = _compact(date_order, self.n_rows)
+        self.sorted_dates = dates[date_order]
+        valid = self.sorted_dates[~np.isnat(self.sorted_dates)]
+        self.date_min = valid[0] if len(valid) else None
+        self.date_max = valid[-1] if len(valid) else None
+
+        self.measures = {col: df[col].to_numpy() for col in measures if col in df.columns}
+        self._selections = LRUCache(cache_size)
+
+    def clear_cache(self):
+        """Forget the cached row selections"""
+        self._selections.clear()
+
+    def _value_positions(self, col, codes):
+        bounds = self.value_bounds[col]
+        rows = self.value_rows[col]
+        return np.concatenate([rows[bounds[code]:bounds[code + 1]] for code in codes]) if len(codes) else rows[:0]
+
+    def select(self, start=None, end=None, filters=None):
+        """Sorted positions of the rows dated from start to end (inclusive) whose dimensions take
+        one of the allowed values; filters maps a dimension to its allowed values"""
+        key = filter_key(start, end, filters)
+        cached = self._selections.get(key)
+        if cached is not None:
+            return cached
+        lookups = {}
+        for col, values in (filters or {}).items():
+            values = pd.Index(list(values))
+            codes = self.values[col].get_indexer(values.dropna().unique())
+            codes = codes[codes >= 0]
+            if values.hasnans:
+                # isin matches missing values when NaN is among the chosen ones
+                codes = np.append(codes, len(self.values[col]))
+            lookups[col] = np.unique(codes)
+        start = np.datetime64(pd.to_datetime(start), 'ns') if start is not None else None
+        end = np.datetime64(pd.to_datetime(end), 'ns') if end is not None else None
+
+        # Candidate row count of each constraint; ones that keep every row are dropped
+        candidates = []
+        lo = np.searchsorted(self.sorted_dates, start, 'left') if start is not None else 0
+        hi = np.searchsorted(self.sorted_dates, end, 'right') if end is not None else self.n_rows
+        if hi - lo < self.n_rows:
+            candidates.append((hi - lo, 'date'))
+        for col, codes in lookups.items():
+            bounds = self.value_bounds[col]
+            count = int((bounds[codes + 1] - bounds[codes]).sum())
+            if count < self.n_rows:
+                candidates.append((count, col))
+
+        if not candidates:
+            rows = np.arange(self.n_rows)
+        else:
+            _, driver = min(candidates)
+            if driver == 'date':
+                rows = np.sort(self.date_rows[lo:hi])
+            else:
+                rows = np.sort(self._value_positions(driver, lookups[driver]))
+            for _, col in candidates:
+                if col == driver or not len(rows):
+                    continue
+                if col == 'date':
+                    dates = self.dates[rows]
+                    keep = np.ones(len(rows), dtype=bool)
+                    if start is not None:
+                        keep &= dates >= start
+                    if end is not None:
+                        keep &= dates <= end
+                else:
+                    allowed = np.zeros(len(self.values[col]) + 1, dtype=bool)
+                    allowed[lookups[col]] = True
+                    keep = allowed[self.codes[col][rows]]
+                rows = rows[keep]
+
+        # Shared between reruns and sessions, so callers must not modify it
+        rows.flags.writeable = False
+        return self._selections.put(key, rows)
+
+    def sum_by(self, rows, col, measure='SALES'):
+        """Sum of measure over the selected rows per value of col, for values that occur"""
+        n_values = len(self.values[col])
+        codes = self.codes[col][rows]
+        values = self.measures[measure]
+        sums = np.bincount(codes, weights=values[rows], minlength=n_values + 1)[:n_values]
+        present = np.bincount(codes, minlength=n_values + 1)[:n_values] > 0
+        if np.issubdtype(values.dtype, np.integer):
+            sums = sums.astype(np.int64)
+        return pd.Series(sums[present], index=self.values[col][present], name=measure)
+
+    def nbytes(self):
+        arrays = list(self.codes.values()) + list(self.value_rows.values()) + [self.date_rows, self.sorted_dates]
+        return int(sum(a.nbytes for a in arrays))
+
+
+def _distinct_pairs(groups, hashes):
+    """groups and hashes with duplicate (group, hash) pairs removed"""
+    order = np.lexsort((hashes, groups))
+    groups, hashes = groups[order], hashes[order]
+    new = np.ones(len(hashes), dtype=bool)
+    new[1:] = (groups[1:] != groups[:-1]) | (hashes[1:] != hashes[:-1])
+    return groups[new], hashes[new]
+
+
+class _SketchLevel:
+    """Distinct-value sketches of the cells of one rollup: a calendar grain and the dimensions
+    the query restricts. A cell keeps the hashes of its distinct values while they take less
+    space than HyperLogLog registers (a hash takes 8 bytes, a register 1), and registers beyond."""
+    def __init__(self, periods, codes, radixes, hashes, precision):
+        keys = periods.astype(np.int64)
+        for col_codes, radix in zip(codes, radixes):
+            keys = keys * radix + col_codes
+        cell_keys, row_cells = np.unique(keys, return_inverse=True)
+        # Decode the period and dimension codes of every cell from its mixed-radix key
+        self.codes = []
+        for radix in radixes[::-1]:
+            self.codes.insert(0, cell_keys % radix)
+            cell_keys = cell_keys // radix
+        self.periods = cell_keys
+        n_cells = len(self.periods)
+
+        pair_cells, pair_hashes = _distinct_pairs(row_cells, hashes)
+        counts = np.bincount(pair_cells, minlength=n_cells)
+        heavy = counts > (1 << precision) // 8
+        register_rows = np.full(n_cells, -1)
+        register_rows[heavy] = np.arange(heavy.sum())
+        self.register_rows = _compact(register_rows, int(heavy.sum()))
+        in_heavy = heavy[pair_cells]
+        self.registers = hll_registers(pair_hashes[in_heavy], register_rows[pair_cells[in_heavy]],
+                                       int(heavy.sum()), precision)
+        self.pair_cells = _compact(pair_cells[~in_heavy], n_cells)
+        self.pair_hashes = pair_hashes[~in_heavy]
+
+    def cell_mask(self, ranges, allowed):
+        """Cells within any of the (first, last) period code ranges whose dimension codes are
+        allowed; allowed holds one boolean lookup table per dimension of the rollup"""
+        mask = np.zeros(len(self.periods), dtype=bool)
+        for first, last in ranges:
+            mask |= (self.periods >= first) & (self.periods <= last)
+        for codes, lookup in zip(self.codes, allowed):
+            if lookup is not None:
+                mask &= lookup[codes]
+        return mask
+
+    def selected(self, mask, groups):
+        """Hashes with group codes, and register rows with group codes, of the cells in mask;
+        groups holds the group code of every cell"""
+        in_mask = mask[self.pair_cells]
+        sketched = np.flatnonzero(mask & (self.register_rows >= 0))
+        return (groups[self.pair_cells[in_mask]], self.pair_hashes[in_mask],
+                groups[sketched], self.registers[self.register_rows[sketched]])
+
+    def nbytes(self):
+        arrays = [self.registers, self.register_rows, self.pair_cells, self.pair_hashes, self.periods] + self.codes
+        return int(sum(a.nbytes for a in arrays))
+
+
+class DistinctCountCube:
+    """Distinct counts of one column (customers by default) for any filter state.
+
+    Keeps every row's value hash, day and dimension codes (COUNTRY added so counts can be
+    broken down by country). A query is answered from a rollup whose cells are split only by
+    the dimensions it restricts (a filter that allows every value restricts nothing) and by
+    its breakdown column, once per day and once per month. It merges the month cells of the
+    whole months in its date range and the day cells of the partial months at either end:
+    exactly while none of them holds registers, within a few percent otherwise. Rollup cells
+    are as coarse as the query allows, so they reach the cardinality at which they are stored
+    as fixed-size registers, and merge cost is bounded by cells x 2^precision rather than
+    growing with the row count. Each rollup is built on the first query that needs it and kept.
+    """
+    def __init__(self, df, value_col='CUSTOMERNAME', dims=CUBE_DIMENSIONS + ['COUNTRY'], date_col='ORDERDATE',
+                 precision=SKETCH_PRECISION):
+        self.value_col = value_col
+        self.precision = precision
+        self.dims = [col for col in dims if col in df.columns]
+        hashes, present = hash_values(df[value_col])
+        days = df[date_col].dt.normalize().to_numpy(dtype='datetime64[ns]')[present]
+        dated = ~np.isnat(days)
+        self.hashes = hashes[dated]
+        rows = np.flatnonzero(present)[dated]
+
+        # Periods are stored as codes into the sorted distinct days and months
+        day_codes, day_values = pd.factorize(days[dated], sort=True)
+        self.day_values = pd.DatetimeIndex(day_values)
+        month_of_day, month_values = pd.factorize(self.day_values.to_period('M').start_time, sort=True)
+        self.month_values = pd.DatetimeIndex(month_values)
+        self.row_periods = {'day': _compact(day_codes, len(self.day_values)),
+                            'month': _compact(month_of_day[day_codes], len(self.month_values))}
+        self.first_day = self.day_values[0] if len(self.day_values) else pd.NaT
+        self.last_day = self.day_values[-1] if len(self.day_values) else pd.NaT
+
+        # Missing values get the code after the last value
+        self.codes = {}
+        self.group_values = {}
+        self.present_codes = {}
+        for col in self.dims:
+            codes, uniques = pd.factorize(df[col].iloc[rows], sort=True)
+            codes[codes < 0] = len(uniques)
+            self.codes[col] = _compact(codes, len(uniques) + 1)
+            self.group_values[col] = pd.Index(uniques, name=col)
+            self.present_codes[col] = np.bincount(codes, minlength=len(uniques) + 1) > 0
+        self._rollups = LRUCache(ROLLUP_CACHE_SIZE)
+        self._rollup_lock = threading.Lock()
+        self._results = LRUCache()
+
+    def clear_cache(self):
+        """Forget the cached counts; built rollups are kept"""
+        self._results.clear()
+
+    def rollup(self, grain, dims):
+        """_SketchLevel of cells by grain ('day' or 'month') and dims, built on first use"""
+        key = (grain, tuple(dims))
+        # One build per rollup even when several sessions ask for it at once
+        with self._rollup_lock:
+            level = self._rollups.get(key)
+            if level is None:
+                radixes = [len(self.group_values[col]) + 1 for col in dims]
+                level = self._rollups.put(key, _SketchLevel(self.row_periods[grain], [self.codes[col] for col in dims],
+                                                            radixes, self.hashes, self.precision))
+            return level
+
+    def _allowed(self, filters):
+        """Lookup table of allowed codes per dimension that a filter restricts"""
+        allowed = {}
+        for col, values in (filters or {}).items():
+            values = pd.Index(list(values))
+            positions = self.group_values[col].get_indexer(values[values.notna()])
+            lookup = np.zeros(len(self.group_values[col]) + 1, dtype=bool)
+            lookup[positions[positions >= 0]] = True
+            lookup[-1] = values.isna().any()
+            # Allowing every value present in the data restricts nothing
+            if not (lookup | ~self.present_codes[col]).all():
+                allowed[col] = lookup
+        return allowed
+
+    def _plan(self, start, end):
+        """Split start..end into (first, last) ranges of whole months and of the remaining days"""
+        start = pd.Timestamp(start).normalize() if start is not None else self.first_day
+        end = pd.Timestamp(end).normalize() if end is not None else self.last_day
+        if pd.isna(start) or pd.isna(end) or start > end:
+            return [], []
+        first_month = start if start.is_month_start else start + pd.offsets.MonthBegin()
+        last_month = end - pd.offsets.MonthBegin(0 if end.is_month_start else 1)
+        if not end.is_month_end:
+            last_month -= pd.offsets.MonthBegin()
+        if first_month > last_month:
+            return [], [(start, end)]
+        day_ranges = []
+        if start < first_month:
+            day_ranges.append((start, first_month - pd.Timedelta(days=1)))
+        after_months = last_month + pd.offsets.MonthBegin()
+        if end >= after_months:
+            day_ranges.append((after_months, end))
+        return [(first_month, last_month)], day_ranges
+
+    @staticmethod
+    def _code_ranges(values, ranges):
+        """(first, last) date ranges as inclusive ranges of codes into the sorted values"""
+        return [(values.searchsorted(first), values.searchsorted(last, side='right') - 1) for first, last in ranges]
+
+    def _parts(self, start, end, filters, col):
+        allowed = self._allowed(filters)
+        dims = [dim for dim in self.dims if dim in allowed or dim == col]
+        lookups = [allowed.get(dim) for dim in dims]
+        month_ranges, day_ranges = self._plan(start, end)
+        parts = []
+        for grain, values, ranges in [('month', self.month_values, month_ranges), ('day', self.day_values, day_ranges)]:
+            level = self.rollup(grain, dims)
+            groups = level.codes[dims.index(col)] if col is not None else np.zeros(len(level.periods), dtype=np.int64)
+            parts.append(level.selected(level.cell_mask(self._code_ranges(values, ranges), lookups), groups))
+        return parts
+
+    def merge_size(self, start=None, end=None, filters=None, col=None):
+        """Hashes plus register rows a query merges, which sets its cost whatever is cached.
+        At most 2^precision / 8 hashes or one register row per selected cell."""
+        parts = self._parts(start, end, filters, col)
+        return int(sum(len(p[1]) + len(p[3]) for p in parts))
+
+    def _merge(self, start, end, filters, col):
+        """Distinct count per group code of col (a single group when col is None)"""
+        n_groups = len(self.group_values[col]) if col is not None else 1
+        parts = self._parts(start, end, filters, col)
+        pair_groups, hashes = _distinct_pairs(np.concatenate([p[0] for p in parts]),
+                                              np.concatenate([p[1] for p in parts]))
+        counts = np.bincount(pair_groups, minlength=n_groups + 1)[:n_groups].astype(np.float64)
+
+        sketched_groups = np.concatenate([p[2] for p in parts])
+        keep = sketched_groups < n_groups
+        if keep.any():
+            # Groups containing a sketched cell merge everything into registers and are estimated
+            registers = hll_registers(hashes, pair_groups, n_groups + 1, self.precision)
+            # Register rows sorted by group and reduced per group; much faster than maximum.at
+            order = np.argsort(sketched_groups[keep], kind='stable')
+            groups = sketched_groups[keep][order]
+            starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+            estimated = groups[starts]
+            merged = np.maximum.reduceat(np.concatenate([p[3] for p in parts])[keep][order], starts, axis=0)
+            registers[estimated] = np.maximum(registers[estimated], merged)
+            counts[estimated] = hll_estimate(registers[estimated])
+        return np.round(counts).astype(np.int64)
+
+    def count_distinct(self, start=None, end=None, filters=None):
+        """Distinct values among the rows matching the filter state"""
+        key = (None, filter_key(start, end, filters))
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        return self._results.put(key, int(self._merge(start, end, filters, None)[0]))
+
+    def count_distinct_by(self, col, start=None, end=None, filters=None):
+        """Distinct values per value of col (one of the cube dimensions) among the matching rows"""
+        key = (col, filter_key(start, end, filters))
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        values = self.group_values[col]
+        counts = self._merge(start, end, filters, col)
+        present = counts > 0
+        return self._results.put(key, pd.Series(counts[present], index=values[present], name=self.value_col))
+
+    def nbytes(self):
+        arrays = [self.hashes] + list(self.row_periods.values()) + list(self.codes.values())
+        return int(sum(a.nbytes for a in arrays) + sum(level.nbytes() for level in self._rollups.values()))
+
+
+class KPIAggregator:
+    """Dashboard KPIs of a filter state, computed once and shared by Quick Stats and the KPI cards.
+
+    The additive totals come from one sum over the selected cube cells and the distinct
+    customer count from merging the customer sketches. Results are kept per filter key, so
+    reruns and other sessions with the same filters reuse them.
+    """
+    def __init__(self, cube, customers, cache_size=FILTER_CACHE_SIZE):
+        self.cube = cube
+        self.customers = customers
+        self._summaries = LRUCache(cache_size)
+
+    def summary(self, start=None, end=None, filters=None):
+        """Same keys as RunningAggregates.summary: total_sales, total_orders, avg_order_value,
+        unique_customers and total_profit"""
+        key = filter_key(start, end, filters)
+        cached = self._summaries.get(key)
+        if cached is not None:
+            return cached
+        totals = SalesCube.totals(self.cube.select(start, end, filters))
+        total_orders = int(totals[ROW_COUNT])
+        return self._summaries.put(key, {
+            'total_sales': totals['SALES'],
+            'total_orders': total_orders,
+            'avg_order_value': totals['SALES'] / total_orders if total_orders else float('nan'),
+            'unique_customers': self.customers.count_distinct(start, end, filters),
+            'total_profit': totals.get('TOTAL_PROFIT', 0)
+        })
+
+
 # Placeholder for advanced analytics logic
 class AnalyticsEngine:
     def __init__(self):
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Batch Scoring Runner - score large CSV or Parquet files with a saved model
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from data_processor import DataProcessor, DEFAULT_CHUNKSIZE, VIRTUAL_FEATURES, PYARROW_AVAILABLE
+from model_manager import ModelManager
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+# Input columns copied to the output so predictions can be joined back to their rows
+ID_COLUMNS = ['ORDERNUMBER', 'ORDERLINENUMBER']
+PREDICTION_COLUMN = 'PREDICTED_PROFIT'
+
+# Per-process scorer, loaded once by init_worker
+_scorer = {}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file with a model saved by ModelManager.save_model")
+    parser.add_argument("model", help="Saved model artifact directory (or a legacy .joblib file)")
+    parser.add_argument("input", help="CSV or .parquet file with raw order lines")
+    parser.add_argument("output", help="Where to write predictions, as CSV or .parquet")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows read, scored and written per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Scoring processes; 1 scores in this process")
+    parser.add_argument("--id-columns", nargs="*", default=ID_COLUMNS,
+                        help="Input columns to copy next to each prediction")
+    return parser.parse_args()
+
+def init_worker(model_path, threads_per_model=1):
+    """Load the model and its encoders once per process; forked workers share its mapped arrays"""
+    model_manager = ModelManager()
+    model_manager.load_model(model_path, mmap_mode='r')
+    model = model_manager.best_model
+    # Workers already run in parallel; keep each model to its share of the cores
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=threads_per_model)
+    if model_manager.encoders is None:
+        print("Warning: model was saved without encoders; category codes may not match training")
+    _scorer['model_manager'] = model_manager
+    _scorer['processor'] = DataProcessor(model_path, use_cache=False, encoders=model_manager.encoders)
+
+def score_chunk(chunk, id_columns):
+    """Derive model features for a raw chunk and predict it; unseen categories get the unknown code"""
+    model_manager = _scorer['model_manager']
+    processor = _scorer['processor']
+    df = processor._derive_features(chunk)
+
+    feature_cols = model_manager.feature_names or [
+        col for col in processor.get_feature_columns() if col in df.columns or col in VIRTUAL_FEATURES
+    ]
+    # predict_sales converts to the training dtype itself, so rows match in-memory predictions exactly
+    X = df[feature_cols]
+
+    scored = df[[col for col in id_columns if col in df.columns]].copy()
+    scored[PREDICTION_COLUMN] = model_manager.predict_sales(X)
+    return scored, len(chunk) - len(df)
+
+class PredictionWriter:
+    """Appends scored chunks to a CSV or Parquet file as they arrive"""
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.writer = None
+        self.rows = 0
+        if self.parquet and not PYARROW_AVAILABLE:
+            raise ImportError("Writing Parquet files requires pyarrow")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, scored):
+        if self.parquet:
+            table = pa.Table.from_pandas(scored, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            scored.to_csv(self.path, mode='a', header=self.rows == 0, index=False)
+        self.rows += len(scored)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def score_file(model_path, input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, workers=1, id_columns=ID_COLUMNS):
+    """Stream input_path through the model in chunks, keeping at most two chunks per worker in flight"""
+    reader = DataProcessor(input_path, use_cache=False)
+    writer = PredictionWriter(output_path)
+    start = time.time()
+    dropped = 0
+
+    try:
+        if workers <= 1:
+            init_worker(model_path, threads_per_model=-1)
+            for chunk in reader.iter_chunks(chunksize):
+                scored, skipped = score_chunk(chunk, id_columns)
+                writer.write(scored)
+                dropped += skipped
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_path,)) as pool:
+                pending = deque()
+                for chunk in reader.iter_chunks(chunksize):
+                    pending.append(pool.submit(score_chunk, chunk, id_columns))
+                    if len(pending) >= 2 * workers:
+                        # Write in input order; waiting on the oldest chunk bounds memory
+                        scored, skipped = pending.popleft().result()
+                        writer.write(scored)
+                        dropped += skipped
+                while pending:
+                    scored, skipped = pending.popleft().result()
+                    writer.write(scored)
+                    dropped += skipped
+    finally:
+        writer.close()
+
+    elapsed = time.time() - start
+    print(f"Scored {writer.rows:,} rows in {elapsed:.1f}s ({writer.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    if dropped:
+        print(f"Skipped {dropped:,} rows with missing SALES, QUANTITYORDERED or PRICEEACH")
+    return writer.rows
+
+def main():
+    args = parse_args()
+    print(f"🚀 Scoring {args.input} with {args.model}...")
+    score_file(args.model, args.input, args.output, chunksize=args.chunksize,
+               workers=args.workers, id_columns=args.id_columns)
+    print(f"✅ Predictions written to {args.output}")
+
+if __name__ == "__main__":
+    main()
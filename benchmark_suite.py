@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - time and memory of the load -> preprocess -> train -> predict pipeline
+on synthetic sales data of growing size
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import sklearn
+from analytics_engine import SalesCube, FilterIndex, DistinctCountCube, KPIAggregator
+from data_processor import DataProcessor
+from model_manager import ModelManager
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+SIZE_CHOICES = [10000, 100000, 1000000, 10000000]
+TEMPLATE_CSV = 'sales_data.csv'
+BENCHMARK_DATA_DIR = '.benchmark_data'
+# Rows written per block when generating data, so the generator itself stays small in memory
+GENERATE_BLOCK_ROWS = 1000000
+# Orders have about this many lines in the sample data
+LINES_PER_ORDER = 9
+STATUS_WEIGHTS = {'Shipped': 0.927, 'Cancelled': 0.021, 'Resolved': 0.017, 'On Hold': 0.016,
+                  'In Process': 0.014, 'Disputed': 0.005}
+CUSTOMER_COLUMNS = ['CUSTOMERNAME', 'PHONE', 'ADDRESSLINE1', 'ADDRESSLINE2', 'CITY', 'STATE', 'POSTALCODE',
+                    'COUNTRY', 'TERRITORY', 'CONTACTLASTNAME', 'CONTACTFIRSTNAME']
+
+
+def generate_sales_data(n_rows, path, template=TEMPLATE_CSV, seed=0):
+    """Write n_rows synthetic order lines with the schema and value ranges of the template CSV.
+
+    Products, customers and their addresses are drawn from the template; quantities, prices,
+    dates and statuses are random, and SALES, DEALSIZE and the calendar ids are derived from
+    them the way they are in the real data.
+    """
+    sample = pd.read_csv(template, encoding='latin-1', keep_default_na=False, dtype=str)
+    columns = list(sample.columns)
+    products = sample[['PRODUCTCODE', 'PRODUCTLINE', 'MSRP']].drop_duplicates('PRODUCTCODE').reset_index(drop=True)
+    customers = sample[CUSTOMER_COLUMNS].drop_duplicates('CUSTOMERNAME').reset_index(drop=True)
+    msrp = products['MSRP'].astype(float).to_numpy()
+    order_days = pd.bdate_range('2003-01-06', '2005-05-31')
+
+    rng = np.random.default_rng(seed)
+    first_order = 10100
+    written = 0
+    with open(path, 'w', encoding='latin-1', newline='') as f:
+        while written < n_rows:
+            n = min(GENERATE_BLOCK_ROWS, n_rows - written)
+            n_orders = max(1, n // LINES_PER_ORDER)
+            order = np.sort(rng.integers(0, n_orders, n))
+            line = np.arange(n) - np.searchsorted(order, order) + 1
+
+            order_day = order_days[np.sort(rng.integers(0, len(order_days), n_orders))][order]
+            customer = customers.iloc[rng.integers(0, len(customers), n_orders)[order]].reset_index(drop=True)
+            status = rng.choice(list(STATUS_WEIGHTS), size=n_orders, p=np.array(list(STATUS_WEIGHTS.values())) / sum(STATUS_WEIGHTS.values()))[order]
+
+            product = rng.integers(0, len(products), n)
+            quantity = rng.integers(6, 98, n)
+            unit_price = np.round(msrp[product] * rng.uniform(0.75, 1.25, n), 2)
+            sales = np.round(quantity * unit_price, 2)
+
+            block = pd.DataFrame({
+                'ORDERNUMBER': first_order + order,
+                'QUANTITYORDERED': quantity,
+                # The sample caps PRICEEACH at 100 while SALES uses the real unit price
+                'PRICEEACH': np.minimum(unit_price, 100),
+                'ORDERLINENUMBER': line,
+                'SALES': sales,
+                'ORDERDATE': order_day.strftime('%-m/%-d/%Y 0:00'),
+                'STATUS': status,
+                'QTR_ID': order_day.quarter,
+                'MONTH_ID': order_day.month,
+                'YEAR_ID': order_day.year,
+                'PRODUCTLINE': products['PRODUCTLINE'].to_numpy()[product],
+                'MSRP': products['MSRP'].to_numpy()[product],
+                'PRODUCTCODE': products['PRODUCTCODE'].to_numpy()[product],
+                'DEALSIZE': np.where(sales < 3000, 'Small', np.where(sales < 7000, 'Medium', 'Large'))
+            })
+            for col in CUSTOMER_COLUMNS:
+                block[col] = customer[col].to_numpy()
+            block[columns].to_csv(f, header=written == 0, index=False)
+
+            first_order += n_orders
+            written += n
+    return path
+
+
+class StageRecorder:
+    """Runs pipeline stages and records their wall time and peak traced memory"""
+    def __init__(self, n_rows, trace_memory=True):
+        self.n_rows = n_rows
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def run(self, stage, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            value = func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if self.trace_memory:
+                tracemalloc.stop()
+        self.record(stage, seconds, peak_mb=peak / 2 ** 20 if peak is not None else None)
+        return value
+
+    def record(self, stage, seconds, **extra):
+        result = {'rows': self.n_rows, 'stage': stage, 'seconds': round(seconds, 4)}
+        result.update({k: round(v, 3) if isinstance(v, float) else v for k, v in extra.items()})
+        self.results.append(result)
+        peak = f", peak {extra['peak_mb']:.1f} MB" if extra.get('peak_mb') is not None else ""
+        print(f"  {stage:<36} {seconds:9.3f}s{peak}")
+
+
+def dashboard_aggregations(df):
+    """The dashboard's charts and KPIs as full-frame groupbys, the baseline for dashboard_queries"""
+    return {
+        'kpis': lambda: (df['SALES'].sum(), df['SALES'].mean(), df['CUSTOMERNAME'].nunique(), df['TOTAL_PROFIT'].sum()),
+        'monthly_trend': lambda: df.groupby(df['ORDERDATE'].dt.to_period('M'))['SALES'].sum(),
+        'product_line_sales': lambda: df.groupby('PRODUCTLINE', observed=True)['SALES'].sum(),
+        'territory_sales': lambda: df.groupby('TERRITORY', observed=True)['SALES'].sum(),
+        'segment_sales': lambda: df.groupby('CUSTOMER_SEGMENT', observed=True)['SALES'].sum(),
+        'top_customers': lambda: df.groupby('CUSTOMERNAME', observed=True)['SALES'].sum().nlargest(10),
+        'country_customers': lambda: df.groupby('COUNTRY', observed=True)['CUSTOMERNAME'].nunique(),
+        'top_products': lambda: df.groupby('PRODUCTCODE')['SALES'].sum().nlargest(10),
+        'yearly_sales': lambda: df.groupby('YEAR_ID')['SALES'].sum()
+    }
+
+
+def dashboard_filter_state(filter_index):
+    """A narrowed sidebar filter state: five quarters of three product lines"""
+    return pd.Timestamp('2003-07-01'), pd.Timestamp('2004-09-30'), {'PRODUCTLINE': filter_index.options['PRODUCTLINE'][:3]}
+
+
+def dashboard_queries(cube, filter_index, customers):
+    """The dashboard's charts and KPIs for one narrowed filter state. Each query builds on cached
+    selections when they exist, so clear the structures' caches before timing one."""
+    start, end, filters = dashboard_filter_state(filter_index)
+    return {
+        'kpis': lambda: KPIAggregator(cube, customers).summary(start, end, filters),
+        'select_rows': lambda: filter_index.select(start, end, filters),
+        'monthly_trend': lambda: cube.rollup(cube.select(start, end, filters), 'MONTH'),
+        'top_customers': lambda: filter_index.sum_by(filter_index.select(start, end, filters), 'CUSTOMERNAME').nlargest(10),
+        'country_customers': lambda: customers.count_distinct_by('COUNTRY', start, end, filters)
+    }
+
+
+def benchmark_size(n_rows, data_dir=BENCHMARK_DATA_DIR, max_train_rows=250000, predict_rows=1000000,
+                   trace_memory=True, lean=False):
+    """Benchmark every pipeline stage on n_rows synthetic rows and return the result records"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"sales_{n_rows}.csv")
+    recorder = StageRecorder(n_rows, trace_memory)
+    print(f"\n📏 {n_rows:,} rows")
+
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        generate_sales_data(n_rows, path)
+        print(f"  generated {path} in {time.perf_counter() - start:.1f}s")
+
+    data_processor = DataProcessor(path, use_cache=False)
+    if not recorder.run('load_data', data_processor.load_data):
+        raise RuntimeError(f"Could not load {path}")
+    processed_df = recorder.run('preprocess_data', data_processor.preprocess_data, lean=lean)
+    X, y = recorder.run('prepare_model_data', data_processor.prepare_model_data, target='TOTAL_PROFIT')
+
+    # Training cost grows much faster than loading; cap it to keep large sizes finishing
+    if len(X) > max_train_rows:
+        sample = np.random.default_rng(0).choice(len(X), max_train_rows, replace=False)
+        X, y = X.iloc[sample], y.iloc[sample]
+    model_manager = ModelManager()
+    finished = []
+    start = time.perf_counter()
+    recorder.run('train_models', model_manager.train_models, X, y, n_jobs=1,
+                 progress_callback=lambda done, total, name: finished.append((name, time.perf_counter())))
+    # n_jobs=1 fits one model at a time, so the gaps between completions are the per-model times
+    previous = start
+    for name, finished_at in finished:
+        recorder.record(f"train_models.{name}", finished_at - previous, train_rows=len(X))
+        previous = finished_at
+
+    X_predict = X.iloc[:predict_rows]
+    start = time.perf_counter()
+    model_manager.predict_sales(X_predict)
+    seconds = time.perf_counter() - start
+    recorder.record(f"predict_sales.{model_manager.best_model_name}", seconds,
+                    predict_rows=len(X_predict), rows_per_second=len(X_predict) / max(seconds, 1e-9))
+
+    for name, aggregation in dashboard_aggregations(processed_df).items():
+        recorder.run(f"dashboard.{name}", aggregation)
+
+    # What the dashboard does instead: build the query structures once, then answer a filter state
+    cube = recorder.run('dashboard.build_sales_cube', SalesCube, processed_df)
+    filter_index = recorder.run('dashboard.build_filter_index', FilterIndex, processed_df)
+    customers = recorder.run('dashboard.build_customer_sketches', DistinctCountCube, processed_df)
+    # The customer rollups the queries read; the dashboard builds each on its first use and keeps it
+    start, end, filters = dashboard_filter_state(filter_index)
+    recorder.run('dashboard.build_customer_rollups',
+                 lambda: [customers.merge_size(start, end, filters, col) for col in [None, 'COUNTRY']])
+    for name, query in dashboard_queries(cube, filter_index, customers).items():
+        # Time every query on empty caches, as the first session with a new filter state sees it
+        for structure in [cube, filter_index, customers]:
+            structure.clear_cache()
+        recorder.run(f"dashboard_query.{name}", query)
+    return recorder.results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'scikit-learn': sklearn.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def compare_results(results, baseline_path, threshold=0.2, min_seconds=0.01):
+    """Print stages that got slower than the baseline file by more than threshold; returns them.
+    Stages faster than min_seconds in both runs are skipped as timer noise."""
+    with open(baseline_path) as f:
+        baseline = {(r['rows'], r['stage']): r['seconds'] for r in json.load(f)['results'] if 'seconds' in r}
+    regressions = []
+    print(f"\n🔍 Compared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result['rows'], result['stage']))
+        if before is None or 'seconds' not in result or before <= 0:
+            continue
+        if max(before, result['seconds']) < min_seconds:
+            continue
+        change = result['seconds'] / before - 1
+        if change > threshold:
+            regressions.append(dict(result, baseline_seconds=before, change=round(change, 3)))
+            print(f"  ⚠️ {result['rows']:,} rows {result['stage']}: {before:.3f}s -> {result['seconds']:.3f}s (+{change:.0%})")
+    if not regressions:
+        print(f"  No stage is more than {threshold:.0%} slower")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the sales pipeline on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, choices=SIZE_CHOICES,
+                        help="Row counts to benchmark")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--data-dir", default=BENCHMARK_DATA_DIR, help="Where generated CSVs are kept between runs")
+    parser.add_argument("--max-train-rows", type=int, default=250000,
+                        help="Train on a random sample of at most this many rows")
+    parser.add_argument("--predict-rows", type=int, default=1000000, help="Rows scored for predict throughput")
+    parser.add_argument("--lean", action="store_true", help="Benchmark the dashboard's lean preprocessing")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc; its overhead inflates the timings of pandas-heavy stages")
+    parser.add_argument("--compare", default=None, help="Earlier results file to check for slowdowns")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown reported as a regression")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print("🚀 Starting benchmark suite...")
+    results = []
+    for n_rows in args.sizes:
+        if len(args.sizes) == 1:
+            results.extend(benchmark_size(n_rows, args.data_dir, args.max_train_rows, args.predict_rows,
+                                          not args.no_memory, args.lean))
+            continue
+        # One process per size: memory from one size does not skew the next, and running out
+        # of memory at a large size still keeps the smaller sizes' results
+        part = f"{args.output}.{n_rows}.part"
+        command = [sys.executable, os.path.abspath(__file__), "--sizes", str(n_rows), "--output", part,
+                   "--data-dir", args.data_dir, "--max-train-rows", str(args.max_train_rows),
+                   "--predict-rows", str(args.predict_rows)]
+        command += ["--lean"] * args.lean + ["--no-memory"] * args.no_memory
+        completed = subprocess.run(command)
+        if completed.returncode == 0 and os.path.exists(part):
+            with open(part) as f:
+                results.extend(json.load(f)['results'])
+            os.remove(part)
+        else:
+            print(f"❌ {n_rows:,} rows failed with exit code {completed.returncode}")
+            results.append({'rows': n_rows, 'stage': 'suite', 'error': f"exit code {completed.returncode}"})
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        compare_results(results, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,140 @@ Dashboard Components Module
 Reusable UI components for the sales analytics dashboard
 """
 
+import json
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+from analytics_engine import LRUCache
+
+# Points a line chart sends at most; longer series are downsampled with LTTB
+MAX_LINE_POINTS = 500
+# Points a scatter sends at most; larger scatters are binned on a grid
+MAX_SCATTER_POINTS = 2000
+SCATTER_BINS = 40
+# Bars or slices a category chart shows at most; the rest are collapsed into one
+MAX_CATEGORIES = 12
+OTHER_LABEL = 'Other'
+# Figures kept as JSON per chart and filter state
+FIGURE_CACHE_SIZE = 256
+
+# Only the layout the dashboard's dark charts need. plotly_dark adds about 7 KB of per-trace-type
+# defaults to every figure's JSON.
+COMPACT_TEMPLATE = go.layout.Template(layout={
+    'colorway': ['#636efa', '#EF553B', '#00cc96', '#ab63fa', '#FFA15A', '#19d3f3', '#FF6692', '#B6E880'],
+    'font': {'color': '#f2f5fa'},
+    'paper_bgcolor': 'rgba(0,0,0,0)',
+    'plot_bgcolor': 'rgba(0,0,0,0)',
+    'xaxis': {'gridcolor': '#283442', 'linecolor': '#506784', 'zerolinecolor': '#283442'},
+    'yaxis': {'gridcolor': '#283442', 'linecolor': '#506784', 'zerolinecolor': '#283442'},
+    'title': {'x': 0.05}
+})
+
+
+def lttb(y, n_out, x=None):
+    """Positions of the n_out points Largest-Triangle-Three-Buckets keeps from the series y.
+
+    The first and last points are always kept; every bucket in between keeps the point that
+    forms the largest triangle with the previously kept point and the next bucket's average,
+    which preserves the visual shape of the line. x defaults to evenly spaced positions.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        keep[i + 1] = previous
+    return keep
+
+
+def min_max_downsample(y, n_out):
+    """Positions of the minimum and maximum of each of n_out // 2 buckets of y, in order.
+    Keeps every spike, where LTTB keeps the overall shape."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    keep = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            keep.extend([start + int(np.argmin(y[start:stop])), start + int(np.argmax(y[start:stop]))])
+    return np.unique(keep)
+
+
+def downsample_series(series, max_points=MAX_LINE_POINTS, method='lttb'):
+    """series reduced to at most max_points points ('lttb' or 'minmax'), unchanged when shorter"""
+    if len(series) <= max_points:
+        return series
+    y = series.to_numpy(dtype=np.float64)
+    keep = lttb(y, max_points) if method == 'lttb' else min_max_downsample(y, max_points)
+    return series.iloc[keep]
+
+
+def top_n_with_other(series, n=MAX_CATEGORIES, other_label=OTHER_LABEL):
+    """The n - 1 largest values of series plus their remainder under other_label, when series
+    has more than n values"""
+    if len(series) <= n:
+        return series
+    ordered = series.sort_values(ascending=False)
+    top = ordered.iloc[:n - 1]
+    top.index = top.index.astype(object)
+    return pd.concat([top, pd.Series({other_label: ordered.iloc[n - 1:].sum()})]).rename(series.name)
+
+
+def bin_scatter(df, x, y, max_points=MAX_SCATTER_POINTS, bins=SCATTER_BINS):
+    """df[[x, y]] with a count column: the points themselves when there are at most max_points,
+    otherwise the centres of the occupied cells of a bins x bins grid with their point counts"""
+    if len(df) <= max_points:
+        return df[[x, y]].assign(count=1), False
+    counts, x_edges, y_edges = np.histogram2d(df[x].to_numpy(dtype=np.float64),
+                                              df[y].to_numpy(dtype=np.float64), bins=bins)
+    x_idx, y_idx = np.nonzero(counts)
+    binned = pd.DataFrame({
+        x: (x_edges[x_idx] + x_edges[x_idx + 1]) / 2,
+        y: (y_edges[y_idx] + y_edges[y_idx + 1]) / 2,
+        'count': counts[x_idx, y_idx].astype(np.int64)
+    })
+    return binned, True
+
+
+class FigureCache:
+    """Serialized figures by (chart, filter key), shared by all sessions of one dataset"""
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self._figures = LRUCache(max_entries)
+
+    def get_json(self, chart, key, build):
+        """JSON of the figure build() returns, building it only on the first request"""
+        spec = self._figures.get((chart, key))
+        if spec is None:
+            spec = self._figures.put((chart, key), build().to_json())
+        return spec
+
 
-# Placeholder for reusable dashboard components
 class DashboardComponents:
-    def __init__(self):
-        pass
-    # Add reusable UI components as needed
\ No newline at end of file
+    """Chart rendering through the figure cache"""
+    def __init__(self, figure_cache=None):
+        self.figure_cache = figure_cache
+
+    def plotly_chart(self, chart, key, build, **kwargs):
+        """Render the figure build() returns, reusing the cached JSON of chart for the same key.
+        build must only depend on the data behind key."""
+        if self.figure_cache is None or key is None:
+            st.plotly_chart(build(), **kwargs)
+            return
+        st.plotly_chart(json.loads(self.figure_cache.get_json(chart, key, build)), **kwargs)
@@ -1,29 +1,350 @@
+import codecs
+import hashlib
+import io
+import json
+import os
 import pandas as pd
 import numpy as np
+from pandas.tseries.api import guess_datetime_format
+from encoders import EncoderRegistry
+
+# Feather (pyarrow) backs the on-disk column cache; without it every load parses the CSV
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CACHE_DIR_NAME = '.data_cache'
+
+# latin-1 maps every byte, so it is the last resort when a sample is not valid UTF-8
+FALLBACK_ENCODING = 'latin-1'
+ENCODING_SAMPLE_BYTES = 1 << 16
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+]
+
+DEFAULT_CHUNKSIZE = 100000
+
+# Additive columns tracked by RunningAggregates during chunked loads
+MEASURE_COLS = ['SALES', 'TOTAL_PROFIT', 'QUANTITYORDERED']
+
+# Narrow dtypes applied by preprocess_data(lean=True); SALES and TOTAL_PROFIT stay float64
+# so revenue totals keep full precision
+LEAN_DTYPE_PLAN = {
+    'YEAR': 'int16', 'MONTH': 'int8', 'DAY': 'int8', 'DAYOFWEEK': 'int8', 'QUARTER': 'int8',
+    'YEAR_ID': 'int16', 'MONTH_ID': 'int8', 'QTR_ID': 'int8',
+    'ORDERLINENUMBER': 'int16', 'QUANTITYORDERED': 'int32',
+    'DEALSIZE_NUMERIC': 'int8', 'STATUS_NUMERIC': 'int8', 'TERRITORY_RANK': 'int8',
+    'PRICEEACH': 'float32', 'MSRP': 'float32', 'PROFIT_MARGIN': 'float32', 'AVG_SALES': 'float32',
+    'STATUS': 'category', 'TERRITORY': 'category', 'PRODUCTLINE': 'category',
+    'DEALSIZE': 'category', 'COUNTRY': 'category', 'CUSTOMERNAME': 'category'
+}
+
+# Model features that lean frames do not store: duplicates of another column or constants
+VIRTUAL_FEATURES = {'TOTAL_QUANTITY': 'QUANTITYORDERED', 'ORDER_COUNT': 1}
+
+# Raw columns _derive_features reads to build each derived model feature; other features are raw columns
+FEATURE_SOURCES = {
+    'DEALSIZE_NUMERIC': ['DEALSIZE'], 'STATUS_NUMERIC': ['STATUS'], 'TERRITORY_RANK': ['TERRITORY'],
+    'YEAR': ['ORDERDATE'], 'MONTH': ['ORDERDATE'], 'DAY': ['ORDERDATE'], 'DAYOFWEEK': ['ORDERDATE'],
+    'QUARTER': ['ORDERDATE'], 'PROFIT_MARGIN': ['MSRP', 'PRICEEACH'], 'TOTAL_QUANTITY': ['QUANTITYORDERED'],
+    'AVG_SALES': ['SALES', 'QUANTITYORDERED'], 'ORDER_COUNT': []
+}
+# Raw columns that hold text rather than numbers
+TEXT_SOURCES = ['DEALSIZE', 'STATUS', 'TERRITORY', 'ORDERDATE']
+
+# Content hashes keyed by absolute path, reused while size and mtime are unchanged
+_FINGERPRINTS = {}
+
+
+def parse_order_dates(values):
+    """Parse ORDERDATE with a format guessed once from the first value instead of per element"""
+    sample = values.dropna()
+    fmt = guess_datetime_format(str(sample.iloc[0])) if len(sample) else None
+    if fmt is not None:
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+        # Fall back to per-value inference if the file mixes date formats
+        if parsed.isna().sum() == values.isna().sum():
+            return parsed
+    return pd.to_datetime(values, errors='coerce')
+
+
+def _hash_file(path, nbytes=None):
+    """SHA-1 of the whole file, or of its first nbytes"""
+    digest = hashlib.sha1()
+    remaining = nbytes
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _align_dtypes(rows, reference):
+    """Cast columns of newly read rows to the dtypes already used by reference"""
+    for col in rows.columns.intersection(reference.columns):
+        dtype = reference[col].dtype
+        if rows[col].dtype == dtype:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Widen the categories so both frames share one dtype and concat keeps it
+            new = pd.Index(rows[col].dropna().unique()).difference(dtype.categories)
+            if len(new):
+                reference[col] = reference[col].cat.add_categories(new)
+            rows[col] = rows[col].astype(reference[col].dtype)
+            continue
+        try:
+            rows[col] = rows[col].astype(dtype)
+        except (ValueError, TypeError):
+            pass
+    return rows
+
+
+def stream_codec(filepath, encoding):
+    """Codec for bytes read from the middle of a file in encoding: the BOM only starts the file,
+    so UTF-16 takes the byte order its BOM names and UTF-8 with a BOM is plain UTF-8"""
+    if codecs.lookup(encoding).name == 'utf-16':
+        with open(filepath, 'rb') as f:
+            return 'utf-16-be' if f.read(2) == codecs.BOM_UTF16_BE else 'utf-16-le'
+    if codecs.lookup(encoding).name == 'utf-8-sig':
+        return 'utf-8'
+    return encoding
+
+
+def detect_encoding(filepath, sample_bytes=ENCODING_SAMPLE_BYTES):
+    """Pick the file encoding from its BOM and UTF-8 validity of the head and tail samples"""
+    size = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        head = f.read(sample_bytes)
+        tail = b''
+        if size > sample_bytes:
+            f.seek(max(size - sample_bytes, sample_bytes))
+            tail = f.read()
+    
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding, 'bom'
+    
+    # The sample edges may cut a multi-byte character; drop partial sequences there
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=not tail and size <= sample_bytes)
+        for _ in range(3):
+            if tail and 0x80 <= tail[0] < 0xC0:
+                tail = tail[1:]
+        tail.decode('utf-8')
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING, 'sample'
+    return 'utf-8', 'sample'
+
+
+class RunningAggregates:
+    """Sales totals and per-group sums maintained chunk by chunk"""
+    def __init__(self, group_cols=('PRODUCTLINE', 'TERRITORY', 'DEALSIZE', 'COUNTRY')):
+        self.group_cols = list(group_cols)
+        self.rows = 0
+        self.totals = None
+        self.by_group = {}
+        self.customers = set()
+
+    def update(self, df):
+        """Fold a preprocessed chunk into the running totals"""
+        measures = [col for col in MEASURE_COLS if col in df.columns]
+        self.rows += len(df)
+        
+        sums = df[measures].sum()
+        self.totals = sums if self.totals is None else self.totals.add(sums, fill_value=0)
+        
+        for col in self.group_cols:
+            if col not in df.columns:
+                continue
+            grouped = df.groupby(col, observed=True, dropna=False)[measures].sum()
+            previous = self.by_group.get(col)
+            self.by_group[col] = grouped if previous is None else previous.add(grouped, fill_value=0)
+        
+        if 'CUSTOMERNAME' in df.columns:
+            self.customers.update(df['CUSTOMERNAME'].dropna().unique())
+
+    def summary(self):
+        totals = self.totals if self.totals is not None else pd.Series(dtype=float)
+        total_sales = totals.get('SALES', 0)
+        return {
+            'total_sales': total_sales,
+            'total_orders': self.rows,
+            'avg_order_value': total_sales / self.rows if self.rows else 0,
+            'unique_customers': len(self.customers),
+            'total_profit': totals.get('TOTAL_PROFIT')
+        }
+
 
 class DataProcessor:
-    def __init__(self, filepath):
+    def __init__(self, filepath, use_cache=True, cache_dir=None, encoders=None):
         self.filepath = filepath
         self.df = None
+        self.use_cache = use_cache and PYARROW_AVAILABLE
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(filepath)), CACHE_DIR_NAME)
+        self.load_metadata = {}
+        # Pass the registry restored by ModelManager.load_model to score new data with training codes
+        self.encoders = encoders if encoders is not None else EncoderRegistry()
+        self.processed_df = None
+        self.aggregates = None
+        self.model_X = None
+        self.model_y = None
+        self.model_feature_cols = None
+        # Byte offset of the last complete row read from the source, used by refresh()
+        self.source_offset = None
+        # Whether the last refresh() replaced the data with a full reload instead of appending
+        self.reloaded = False
+        self.source_columns = None
+        self.last_order_number = None
+        self.lean = False
+
+    def get_fingerprint(self):
+        """Return size, mtime and content hash of the source file"""
+        path = os.path.abspath(self.filepath)
+        stat = os.stat(path)
+        known = _FINGERPRINTS.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return dict(known)
+        
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': _hash_file(path)}
+        _FINGERPRINTS[path] = fingerprint
+        return dict(fingerprint)
+
+    def _cache_paths(self):
+        base = os.path.join(self.cache_dir, os.path.basename(self.filepath))
+        return base + '.feather', base + '.meta.json'
+
+    def _load_from_cache(self):
+        """Load typed columns from the Feather cache if it matches the current file"""
+        data_path, meta_path = self._cache_paths()
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return False
+        
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        
+        stat = os.stat(self.filepath)
+        appended = False
+        if meta['size'] < stat.st_size:
+            # Append-only growth keeps the cached rows valid; only the tail needs parsing
+            if _hash_file(self.filepath, meta['size']) != meta['sha1']:
+                return False
+            appended = True
+        elif meta['size'] != stat.st_size:
+            return False
+        elif meta['mtime_ns'] != stat.st_mtime_ns:
+            # Touched but possibly unchanged: only the content hash decides
+            if meta['sha1'] != self.get_fingerprint()['sha1']:
+                return False
+            meta['mtime_ns'] = stat.st_mtime_ns
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        
+        table = feather.read_table(data_path, memory_map=True)
+        self.df = table.to_pandas()
+        self.load_metadata = {
+            'source': 'cache',
+            'encoding': meta['encoding'],
+            'fingerprint': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': meta['sha1']}
+        }
+        self.source_offset = meta['size']
+        self._remember_source(self.df)
+        
+        if appended:
+            rows = self._read_delta()
+            if rows is not None:
+                self.df = pd.concat([self.df, _align_dtypes(rows, self.df)], ignore_index=True)
+                self._remember_source(self.df)
+            self.load_metadata['source'] = 'cache+append'
+            self._write_cache()
+        return True
+
+    def _remember_source(self, raw):
+        self.source_columns = list(raw.columns)
+        if 'ORDERNUMBER' in raw.columns and len(raw):
+            self.last_order_number = raw['ORDERNUMBER'].max()
 
-    def load_data(self):
+    def _read_delta(self):
+        """Read complete rows written after source_offset and advance it past them"""
+        encoding = stream_codec(self.filepath, self.load_metadata.get('encoding') or FALLBACK_ENCODING)
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.source_offset)
+            data = f.read()
+        # A writer may be mid-row; leave the partial last line for the next refresh. In UTF-16 the
+        # newline is two bytes and only counts where a character starts.
+        newline = '\n'.encode(encoding)
+        end = data.rfind(newline)
+        while end > 0 and end % len(newline):
+            end = data.rfind(newline, 0, end)
+        data = data[:end + len(newline)] if end >= 0 else b''
+        self.source_offset += len(data)
+        if not data.strip():
+            return None
+        
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+            rows = pd.read_csv(io.BytesIO(data), encoding=encoding, header=None, names=self.source_columns)
+        except UnicodeDecodeError:
+            rows = pd.read_csv(io.BytesIO(data), encoding=FALLBACK_ENCODING, header=None, names=self.source_columns)
+        if 'ORDERDATE' in rows.columns:
+            rows['ORDERDATE'] = parse_order_dates(rows['ORDERDATE'])
+        return rows
+
+    def _write_cache(self):
+        """Persist the typed frame as Feather next to a JSON fingerprint"""
+        data_path, meta_path = self._cache_paths()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fingerprint = self.get_fingerprint()
+            if fingerprint['size'] != self.source_offset:
+                # The file changed while it was being read; the frame no longer matches it
+                return
+            table = pa.Table.from_pandas(self.df, preserve_index=False)
+            feather.write_feather(table, data_path + '.tmp', compression='uncompressed')
+            os.replace(data_path + '.tmp', data_path)
+            meta = dict(fingerprint, encoding=self.load_metadata.get('encoding'))
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + '.tmp', meta_path)
+            self.load_metadata['fingerprint'] = fingerprint
+        except (OSError, pa.ArrowException) as e:
+            print(f"Warning: could not write data cache: {e}")
+
+    def load_data(self, chunksize=None, keep_model_data=True):
+        if chunksize:
+            return self._load_chunked(chunksize, keep_model_data)
+        try:
+            if self.use_cache and self._load_from_cache():
+                print(f"Data loaded from cache: {len(self.df)} rows, {len(self.df.columns)} columns")
+                return True
             
-            for encoding in encodings:
-                try:
-                    self.df = pd.read_csv(self.filepath, encoding=encoding)
-                    print(f"Data loaded successfully with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                raise Exception("Could not decode file with any standard encoding")
+            # Decide the encoding from byte samples so the CSV is parsed once
+            encoding, detected_by = detect_encoding(self.filepath)
+            self.source_offset = os.path.getsize(self.filepath)
+            try:
+                self.df = pd.read_csv(self.filepath, encoding=encoding)
+            except UnicodeDecodeError:
+                # A bad byte outside the sampled ranges
+                encoding, detected_by = FALLBACK_ENCODING, 'fallback'
+                self.df = pd.read_csv(self.filepath, encoding=encoding)
+            self.load_metadata = {'source': 'csv', 'encoding': encoding, 'encoding_detected_by': detected_by}
+            print(f"Data loaded successfully with {encoding} encoding")
             
             # Convert ORDERDATE to datetime if it exists
             if 'ORDERDATE' in self.df.columns:
-                self.df['ORDERDATE'] = pd.to_datetime(self.df['ORDERDATE'], errors='coerce')
+                self.df['ORDERDATE'] = parse_order_dates(self.df['ORDERDATE'])
+            self._remember_source(self.df)
+            
+            if self.use_cache:
+                self._write_cache()
             
             print(f"Data loaded successfully: {len(self.df)} rows, {len(self.df.columns)} columns")
             print(f"Columns: {list(self.df.columns)}")
@@ -32,15 +353,222 @@ class DataProcessor:
             print(f"Error loading data: {e}")
             return False
 
-    def preprocess_data(self):
+    def iter_chunks(self, chunksize=DEFAULT_CHUNKSIZE):
+        """Yield typed chunks of the raw CSV (or Parquet file) without reading the whole file"""
+        if self.filepath.endswith('.parquet'):
+            yield from self._iter_parquet_chunks(chunksize)
+            return
+        encoding, detected_by = detect_encoding(self.filepath)
+        self.load_metadata = {'source': 'csv-chunks', 'encoding': encoding, 'encoding_detected_by': detected_by}
+        self.source_offset = os.path.getsize(self.filepath)
+        
+        rows_read = 0
+        while True:
+            # Resume after the rows already yielded if a later chunk forces the fallback encoding
+            skiprows = range(1, rows_read + 1) if rows_read else None
+            reader = pd.read_csv(self.filepath, encoding=encoding, chunksize=chunksize, skiprows=skiprows)
+            try:
+                for chunk in reader:
+                    if 'ORDERDATE' in chunk.columns:
+                        chunk['ORDERDATE'] = parse_order_dates(chunk['ORDERDATE'])
+                    rows_read += len(chunk)
+                    self.source_columns = list(chunk.columns)
+                    if 'ORDERNUMBER' in chunk.columns and len(chunk):
+                        last = chunk['ORDERNUMBER'].max()
+                        self.last_order_number = last if self.last_order_number is None else max(last, self.last_order_number)
+                    yield chunk
+                return
+            except UnicodeDecodeError:
+                if encoding == FALLBACK_ENCODING:
+                    raise
+                encoding = FALLBACK_ENCODING
+                self.load_metadata.update(encoding=encoding, encoding_detected_by='fallback')
+            finally:
+                reader.close()
+
+    def _iter_parquet_chunks(self, chunksize):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Reading Parquet files requires pyarrow")
+        self.load_metadata = {'source': 'parquet-chunks'}
+        parquet_file = pq.ParquetFile(self.filepath)
+        self.source_columns = parquet_file.schema_arrow.names
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            if 'ORDERDATE' in chunk.columns and not pd.api.types.is_datetime64_any_dtype(chunk['ORDERDATE']):
+                chunk['ORDERDATE'] = parse_order_dates(chunk['ORDERDATE'])
+            yield chunk
+
+    def iter_processed_chunks(self, chunksize=DEFAULT_CHUNKSIZE, extend_encoders=True):
+        """Yield preprocessed chunks; categories first seen in later chunks get new codes
+        unless extend_encoders is False, in which case they map to the unknown code"""
+        for chunk in self.iter_chunks(chunksize):
+            yield self._derive_features(chunk, extend_encoders=extend_encoders)
+
+    def _chunk_model_arrays(self, chunk, target='TOTAL_PROFIT'):
+        feature_cols = [col for col in self.get_feature_columns() if col in chunk.columns]
+        X = chunk[feature_cols].to_numpy(dtype=np.float32)
+        y = chunk[target].to_numpy(dtype=np.float32) if target in chunk.columns else None
+        return feature_cols, X, y
+
+    def _load_chunked(self, chunksize, keep_model_data=True):
+        """Stream the CSV, keeping running aggregates and float32 model arrays instead of the frame"""
+        try:
+            self.df = None
+            self.processed_df = None
+            self.aggregates = RunningAggregates()
+            X_parts, y_parts = [], []
+            
+            for chunk in self.iter_processed_chunks(chunksize):
+                self.aggregates.update(chunk)
+                if keep_model_data:
+                    self.model_feature_cols, X, y = self._chunk_model_arrays(chunk)
+                    X_parts.append(X)
+                    if y is not None:
+                        y_parts.append(y)
+            
+            if X_parts:
+                self.model_X = np.concatenate(X_parts)
+                self.model_y = np.concatenate(y_parts) if y_parts else None
+            
+            print(f"Data loaded in chunks of {chunksize}: {self.aggregates.rows} rows "
+                  f"with {self.load_metadata['encoding']} encoding")
+            return True
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return False
+
+    def preprocess_data(self, lean=False):
+        """Derive model and dashboard columns.
+        
+        lean=True works on the loaded frame in place, applies LEAN_DTYPE_PLAN and leaves
+        VIRTUAL_FEATURES to prepare_model_data; original_df is not kept in that mode.
+        """
         if self.df is None:
             print("Error: No data loaded")
             return None
+        
+        self.lean = lean
+        if lean:
+            raw_bytes = self.df.memory_usage(deep=True).sum()
+            self.original_df = None
+            df = self._derive_features(self.df, lean=True)
+            unplanned_bytes = df.memory_usage(deep=True).sum()
+            df = self._apply_dtype_plan(df)
+            lean_bytes = df.memory_usage(deep=True).sum()
+            # Baseline mode also stores one int64 column per virtual feature and a copy of the raw frame
+            virtual_bytes = len(df) * 8 * len(VIRTUAL_FEATURES)
+            self.memory_report = {
+                'processed_bytes': int(lean_bytes),
+                'dtype_plan_saved': int(unplanned_bytes - lean_bytes),
+                'virtual_features_saved': int(virtual_bytes),
+                'copies_avoided': int(raw_bytes),
+                'total_saved': int(unplanned_bytes - lean_bytes + virtual_bytes + raw_bytes)
+            }
+            print(f"Lean preprocessing saved {self.memory_report['total_saved'] / 1e6:.1f} MB "
+                  f"({lean_bytes / 1e6:.1f} MB resident)")
+        else:
+            df = self.df.copy()
             
-        df = self.df.copy()
+            # Store original df for reference
+            self.original_df = self.df.copy()
+            
+            df = self._derive_features(df)
+        
+        # Store both processed and original data
+        self.processed_df = df
+        self.df = df  # Keep this for backward compatibility
+        
+        print(f"Data preprocessed successfully: {len(df)} rows, {len(df.columns)} columns")
+        return df
+
+    def _apply_dtype_plan(self, df):
+        """Downcast columns per LEAN_DTYPE_PLAN, keeping float32 for integers with gaps or overflow"""
+        for col, dtype in LEAN_DTYPE_PLAN.items():
+            if col not in df.columns or df[col].dtype == dtype:
+                continue
+            if dtype.startswith('int'):
+                values = df[col]
+                info = np.iinfo(dtype)
+                if values.isna().any():
+                    dtype = 'float32'
+                elif len(values) and (values.min() < info.min or values.max() > info.max):
+                    continue
+            df[col] = df[col].astype(dtype)
+        return df
+
+    def append(self, new_rows, only_new_orders=True):
+        """Preprocess only new raw rows and add them to the processed frame and running aggregates.
+        
+        With only_new_orders, rows whose ORDERNUMBER is not past the last one loaded are skipped.
+        Returns the number of rows added.
+        """
+        rows = pd.DataFrame(new_rows)
+        if only_new_orders and self.last_order_number is not None and 'ORDERNUMBER' in rows.columns:
+            rows = rows[rows['ORDERNUMBER'] > self.last_order_number]
+        if rows.empty:
+            return 0
+        if 'ORDERDATE' in rows.columns and not pd.api.types.is_datetime64_any_dtype(rows['ORDERDATE']):
+            rows['ORDERDATE'] = parse_order_dates(rows['ORDERDATE'])
+        if 'ORDERNUMBER' in rows.columns:
+            last = rows['ORDERNUMBER'].max()
+            self.last_order_number = last if self.last_order_number is None else max(last, self.last_order_number)
+        
+        if self.processed_df is None and self.model_X is None and self.aggregates is None:
+            # Loaded but not preprocessed yet: extend the raw frame
+            if self.df is not None:
+                self.df = pd.concat([self.df, _align_dtypes(rows, self.df)], ignore_index=True)
+            return len(rows)
+        
+        rows = self._derive_features(rows.reset_index(drop=True), lean=self.lean, extend_encoders=True)
+        if self.aggregates is not None:
+            self.aggregates.update(rows)
         
-        # Store original df for reference
-        self.original_df = self.df.copy()
+        if self.processed_df is not None:
+            if self.lean:
+                rows = self._apply_dtype_plan(rows)
+            rows = _align_dtypes(rows, self.processed_df)
+            # Continue the processed frame's row labels
+            start = self.processed_df.index.max() + 1 if len(self.processed_df) else 0
+            rows.index = pd.RangeIndex(start, start + len(rows))
+            self.processed_df = pd.concat([self.processed_df, rows])
+            self.df = self.processed_df
+        elif self.model_X is not None:
+            _, X, y = self._chunk_model_arrays(rows)
+            self.model_X = np.concatenate([self.model_X, X])
+            if y is not None and self.model_y is not None:
+                self.model_y = np.concatenate([self.model_y, y])
+        
+        print(f"Appended {len(rows)} new rows")
+        return len(rows)
+
+    def refresh(self):
+        """Pick up rows appended to the source file since the last load; returns rows added.
+        
+        A source that shrank was rewritten, so it is reloaded in full: that adds no rows, returns
+        0 and sets self.reloaded, which is False after every other refresh.
+        """
+        self.reloaded = False
+        if self.source_offset is None:
+            print("Error: No data loaded")
+            return 0
+        
+        if os.path.getsize(self.filepath) < self.source_offset:
+            # Rewritten rather than appended to: nothing before the offset can be trusted
+            print("Source file shrank; reloading it in full")
+            if self.processed_df is None and self.model_X is not None:
+                self.reloaded = self.load_data(chunksize=DEFAULT_CHUNKSIZE)
+            elif self.load_data():
+                self.reloaded = self.preprocess_data(lean=self.lean) is not None
+            return 0
+        
+        rows = self._read_delta()
+        if rows is None:
+            return 0
+        return self.append(rows, only_new_orders=False)
+
+    def _derive_features(self, df, lean=False, extend_encoders=False):
+        """Add derived model and dashboard columns to df and drop incomplete rows"""
+        encode = self.encoders.update_transform if extend_encoders else self.encoders.fit_transform
         
         # Calculate TOTAL_PROFIT if not present
         if 'TOTAL_PROFIT' not in df.columns:
@@ -57,17 +585,15 @@ class DataProcessor:
         # Encode DEALSIZE
         if 'DEALSIZE' in df.columns:
             deal_size_map = {'Small': 1, 'Medium': 2, 'Large': 3}
-            df['DEALSIZE_NUMERIC'] = df['DEALSIZE'].map(deal_size_map).fillna(1)
+            df['DEALSIZE_NUMERIC'] = df['DEALSIZE'].map(deal_size_map).astype(float).fillna(1)
         
         # Encode STATUS
         if 'STATUS' in df.columns:
-            status_map = {k: i+1 for i, k in enumerate(df['STATUS'].unique())}
-            df['STATUS_NUMERIC'] = df['STATUS'].map(status_map)
+            df['STATUS_NUMERIC'] = encode(df['STATUS'], 'STATUS')
         
         # Encode TERRITORY
         if 'TERRITORY' in df.columns:
-            terr_map = {k: i+1 for i, k in enumerate(df['TERRITORY'].unique())}
-            df['TERRITORY_RANK'] = df['TERRITORY'].map(terr_map)
+            df['TERRITORY_RANK'] = encode(df['TERRITORY'], 'TERRITORY')
         
         # Date features
         if 'ORDERDATE' in df.columns:
@@ -83,23 +609,22 @@ class DataProcessor:
         
         # Aggregates
         if 'QUANTITYORDERED' in df.columns:
-            df['TOTAL_QUANTITY'] = df['QUANTITYORDERED']
+            if not lean:
+                df['TOTAL_QUANTITY'] = df['QUANTITYORDERED']
             if 'SALES' in df.columns:
                 df['AVG_SALES'] = df['SALES'] / df['QUANTITYORDERED']
         
-        df['ORDER_COUNT'] = 1
+        if not lean:
+            df['ORDER_COUNT'] = 1
         
-        # Drop rows with NaN values in critical columns
+        # Drop rows with NaN values in critical columns, without a copy when none are missing
         critical_cols = ['SALES', 'QUANTITYORDERED', 'PRICEEACH']
         existing_critical_cols = [col for col in critical_cols if col in df.columns]
         if existing_critical_cols:
-            df = df.dropna(subset=existing_critical_cols)
-        
-        # Store both processed and original data
-        self.processed_df = df
-        self.df = df  # Keep this for backward compatibility
+            incomplete = df[existing_critical_cols].isna().any(axis=1)
+            if incomplete.any():
+                df = df[~incomplete]
         
-        print(f"Data preprocessed successfully: {len(df)} rows, {len(df.columns)} columns")
         return df
 
     def get_eda_summary(self):
@@ -113,28 +638,43 @@ class DataProcessor:
         return summary
 
     def prepare_model_data(self, target='TOTAL_PROFIT'):
+        if self.df is None and self.model_X is not None:
+            # Chunked load: wrap the streamed arrays without copying them
+            X = pd.DataFrame(self.model_X, columns=self.model_feature_cols, copy=False)
+            y = pd.Series(self.model_y, name=target, copy=False) if target == 'TOTAL_PROFIT' and self.model_y is not None else None
+            return X, y
         if self.df is None:
             print("Error: No data loaded")
             return None, None
-        df = self.df.copy()
-        # Only use columns that actually exist in the dataframe
-        available_feature_cols = [
-            'QUANTITYORDERED', 'PRICEEACH', 'MSRP', 'QTR_ID', 'MONTH_ID', 'YEAR_ID',
-            'DEALSIZE_NUMERIC', 'STATUS_NUMERIC', 'TERRITORY_RANK', 'ORDERLINENUMBER',
-            'YEAR', 'MONTH', 'DAY', 'DAYOFWEEK', 'QUARTER', 'PROFIT_MARGIN',
-            'TOTAL_QUANTITY', 'AVG_SALES', 'ORDER_COUNT'
-        ]
+        df = self.df
+        # Only use columns that actually exist in the dataframe, or that lean frames derive on demand
+        available_feature_cols = self.get_feature_columns()
+        virtual_cols = {col: source for col, source in VIRTUAL_FEATURES.items()
+                        if col not in df.columns and (not isinstance(source, str) or source in df.columns)}
         # Filter to only include columns that exist
-        feature_cols = [col for col in available_feature_cols if col in df.columns]
+        feature_cols = [col for col in available_feature_cols if col in df.columns or col in virtual_cols]
         
         if not feature_cols:
             print("Warning: No valid feature columns found")
             return None, None
-            
-        X = df[feature_cols]
+        
+        if virtual_cols:
+            columns = {}
+            for col in feature_cols:
+                source = virtual_cols.get(col, col)
+                columns[col] = df[source] if isinstance(source, str) else np.full(len(df), source, dtype=np.int8)
+            X = pd.DataFrame(columns, index=df.index)
+        else:
+            X = df[feature_cols]
         y = df[target] if target in df.columns else None
         return X, y
 
+    def get_model_dates(self):
+        """Order dates aligned with the rows of prepare_model_data, for time-series validation"""
+        if self.df is None or 'ORDERDATE' not in self.df.columns:
+            return None
+        return self.df['ORDERDATE']
+
     def get_feature_columns(self):
         return [
             'QUANTITYORDERED', 'PRICEEACH', 'MSRP', 'QTR_ID', 'MONTH_ID', 'YEAR_ID',
@@ -0,0 +1,87 @@
+"""
+Categorical Encoders
+Deterministic category-to-code mappings shared by preprocessing, training and scoring
+"""
+
+import numpy as np
+import pandas as pd
+
+# Code given to categories that were not seen when the encoder was fitted
+UNKNOWN_CODE = 0
+
+
+class CategoryEncoder:
+    """Maps categories to stable integer codes.
+
+    Known categories get 1..n in sorted order (after a leading code for missing values when
+    the fitted data had any), so codes do not depend on row order. Values outside the fitted
+    categories map to UNKNOWN_CODE.
+    """
+    def __init__(self, categories=None, has_missing=False):
+        self.categories = list(categories) if categories is not None else None
+        self.has_missing = has_missing
+
+    def fit(self, values):
+        values = pd.Series(values)
+        self.categories = sorted(pd.unique(values.dropna()).tolist(), key=str)
+        self.has_missing = bool(values.isna().any())
+        return self
+
+    def update(self, values):
+        """Append unseen categories after the existing codes, which stay unchanged"""
+        if self.categories is None:
+            return self.fit(values)
+        values = pd.Series(values)
+        known = set(self.categories)
+        new = [v for v in pd.unique(values.dropna()).tolist() if v not in known]
+        self.categories.extend(sorted(new, key=str))
+        return self
+
+    def transform(self, values):
+        values = pd.Series(values)
+        offset = 1 + int(self.has_missing)
+        codes = pd.Categorical(values, categories=self.categories).codes.astype(np.int32) + offset
+        # Categorical marks both missing and unseen values with -1
+        unmatched = codes == offset - 1
+        codes[unmatched] = UNKNOWN_CODE
+        if self.has_missing:
+            codes[unmatched & values.isna().to_numpy()] = 1
+        return pd.Series(codes, index=values.index, name=values.name)
+
+    def to_dict(self):
+        return {'categories': self.categories, 'has_missing': self.has_missing}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['categories'], data.get('has_missing', False))
+
+
+class EncoderRegistry:
+    """Named CategoryEncoders, fitted once and serialized with the model"""
+    def __init__(self, encoders=None):
+        self.encoders = dict(encoders or {})
+
+    def is_fitted(self, col):
+        return col in self.encoders
+
+    def fit_transform(self, values, col):
+        """Fit col on first use, then map values with the stored codes"""
+        if col not in self.encoders:
+            self.encoders[col] = CategoryEncoder().fit(values)
+        return self.encoders[col].transform(values)
+
+    def update_transform(self, values, col):
+        """Like fit_transform, but extend the encoder with categories first seen in this batch"""
+        if col in self.encoders:
+            self.encoders[col].update(values)
+        return self.fit_transform(values, col)
+
+    def transform(self, values, col):
+        return self.encoders[col].transform(values)
+
+    def to_dict(self):
+        return {col: encoder.to_dict() for col, encoder in self.encoders.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({col: CategoryEncoder.from_dict(item) for col, item in (data or {}).items()})
@@ -0,0 +1,155 @@
+"""
+Model Evaluation Engine
+Time-ordered and k-fold cross-validation with parallel folds and cached fold predictions
+"""
+
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import StandardScaler
+
+CV_STRATEGIES = ['time_series', 'kfold']
+DEFAULT_CV_SPLITS = 5
+
+
+def time_series_splits(dates, n_splits=DEFAULT_CV_SPLITS):
+    """Expanding-window splits: each fold trains on every order before a cutoff date and tests
+    on the next block of dates. Orders from the same day always land on the same side."""
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    unique_dates = np.unique(dates[~pd.isna(dates)])
+    if len(unique_dates) < n_splits + 1:
+        raise ValueError(f"Need at least {n_splits + 1} distinct dates for {n_splits} time-series folds")
+
+    # n_splits + 1 blocks of consecutive dates; the first block is only ever trained on
+    cuts = np.linspace(0, len(unique_dates), n_splits + 2).astype(int)[1:-1]
+    boundaries = list(unique_dates[cuts]) + [None]
+    splits = []
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        train_idx = np.flatnonzero(dates < start)
+        in_block = dates >= start if end is None else (dates >= start) & (dates < end)
+        splits.append((train_idx, np.flatnonzero(in_block)))
+    return splits
+
+
+def regression_metrics(y_true, y_pred):
+    mse = mean_squared_error(y_true, y_pred)
+    return {
+        'MSE': mse,
+        'RMSE': np.sqrt(mse),
+        'MAE': mean_absolute_error(y_true, y_pred),
+        'R2_Score': r2_score(y_true, y_pred)
+    }
+
+
+def _fit_fold(name, model, X, y, train_idx, test_idx, scaled):
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    if scaled:
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X_train)
+        X_test = scaler.transform(X_test)
+    model = clone(model)
+    model.fit(X_train, y.iloc[train_idx])
+    return model.predict(X_test)
+
+
+class ModelEvaluator:
+    """Cross-validates models and keeps their out-of-fold predictions.
+
+    strategy is 'time_series' (expanding window on order dates) or 'kfold' (shuffled). All
+    model/fold fits run in parallel. Fold predictions are cached by model parameters, data and
+    splits, so evaluating the same model again or computing another metric needs no refit.
+    """
+    def __init__(self, strategy='time_series', n_splits=DEFAULT_CV_SPLITS, n_jobs=None, backend='threading',
+                 random_state=42):
+        if strategy not in CV_STRATEGIES:
+            raise ValueError(f"Unknown CV strategy {strategy}; use one of {CV_STRATEGIES}")
+        self.strategy = strategy
+        self.n_splits = n_splits
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.random_state = random_state
+        self.fold_predictions = {}
+        self._cache = {}
+
+    def config(self):
+        """What determines the splits, for cache keys"""
+        return {'strategy': self.strategy, 'n_splits': self.n_splits, 'random_state': self.random_state}
+
+    def split(self, X, dates=None):
+        if self.strategy == 'time_series':
+            if dates is None:
+                raise ValueError("Time-series cross-validation needs order dates")
+            return time_series_splits(dates, self.n_splits)
+        folds = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        return list(folds.split(X))
+
+    def _cache_key(self, name, model, data_digest):
+        config = {'model': name, 'params': model.get_params(), 'data': data_digest, 'cv': self.config()}
+        return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+    def evaluate(self, models, X, y, dates=None, scaled_models=(), n_jobs=None, progress_callback=None):
+        """Out-of-fold predictions for every model in models (name -> unfitted estimator).
+
+        Models named in scaled_models get a StandardScaler fitted on each training fold.
+        Returns {name: DataFrame of fold, row, y_true, y_pred}.
+        """
+        X = X.reset_index(drop=True)
+        y = pd.Series(np.asarray(y), name='y')
+        splits = self.split(X, dates)
+        data_digest = hashlib.sha1(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes()
+                                   + pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes()).hexdigest()
+
+        keys = {name: self._cache_key(name, model, data_digest) for name, model in models.items()}
+        to_fit = [name for name in models if keys[name] not in self._cache]
+        tasks = [(name, fold) for name in to_fit for fold in range(len(splits))]
+
+        predictions = {}
+        if tasks:
+            finished = Parallel(n_jobs=n_jobs or self.n_jobs or 1, backend=self.backend,
+                                return_as='generator')(
+                delayed(_fit_fold)(name, models[name], X, y, *splits[fold], name in scaled_models)
+                for name, fold in tasks
+            )
+            for done, ((name, fold), y_pred) in enumerate(zip(tasks, finished), start=1):
+                predictions[(name, fold)] = y_pred
+                if progress_callback is not None:
+                    progress_callback(done, len(tasks), f"{name} fold {fold + 1}")
+
+        for name in to_fit:
+            frames = []
+            for fold, (_, test_idx) in enumerate(splits):
+                frames.append(pd.DataFrame({
+                    'fold': fold,
+                    'row': test_idx,
+                    'y_true': y.to_numpy()[test_idx],
+                    'y_pred': predictions[(name, fold)]
+                }))
+            self._cache[keys[name]] = pd.concat(frames, ignore_index=True)
+
+        self.fold_predictions = {name: self._cache[keys[name]] for name in models}
+        return self.fold_predictions
+
+    def fold_metrics(self, metric_fns=None):
+        """Per-fold metrics from the cached predictions; metric_fns maps a name to fn(y_true, y_pred)"""
+        rows = []
+        for name, preds in self.fold_predictions.items():
+            for fold, group in preds.groupby('fold'):
+                if metric_fns is None:
+                    metrics = regression_metrics(group['y_true'], group['y_pred'])
+                else:
+                    metrics = {metric: fn(group['y_true'], group['y_pred']) for metric, fn in metric_fns.items()}
+                rows.append(dict(metrics, Model=name, Fold=fold))
+        return pd.DataFrame(rows)
+
+    def summary(self, metric_fns=None):
+        """Mean of each metric over the folds per model, plus the spread of R2 across folds"""
+        per_fold = self.fold_metrics(metric_fns)
+        summary = per_fold.drop(columns='Fold').groupby('Model', sort=False).mean()
+        if 'R2_Score' in per_fold.columns:
+            summary['R2_Std'] = per_fold.groupby('Model', sort=False)['R2_Score'].std(ddof=0)
+        return summary
@@ -0,0 +1,114 @@
+"""
+Background Job Runner
+Runs training and tuning off the dashboard's script thread and reports their progress
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Finished jobs kept around so sessions that polled late can still collect their result
+MAX_FINISHED_JOBS = 50
+
+
+class Job:
+    """One background task with its status, step progress and result"""
+    def __init__(self, job_id, key, label):
+        self.job_id = job_id
+        self.key = key
+        self.label = label
+        self.status = 'queued'
+        self.done_steps = 0
+        self.total_steps = None
+        self.completed = []
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def report(self, done, total, step=None):
+        """Progress callback handed to the task: done of total steps finished, step names the last one"""
+        with self._lock:
+            self.done_steps = done
+            self.total_steps = total
+            if step is not None:
+                self.completed.append(step)
+
+    @property
+    def finished(self):
+        return self.status in ['done', 'failed']
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def eta(self):
+        """Seconds left, extrapolated from the average time per finished step"""
+        with self._lock:
+            done, total = self.done_steps, self.total_steps
+        if self.status != 'running' or not total or not done:
+            return None
+        return self.elapsed() / done * (total - done)
+
+    def progress(self):
+        with self._lock:
+            if self.status == 'done':
+                return 1.0
+            return self.done_steps / self.total_steps if self.total_steps else 0.0
+
+
+class JobRunner:
+    """Local worker queue for long-running tasks.
+
+    Tasks are callables taking a progress_callback keyword. Submitting a key that already has a
+    queued or running job returns that job instead of starting another, so repeated clicks
+    coalesce. A job's result is only visible once it is complete, letting callers swap it in
+    as a whole.
+    """
+    def __init__(self, max_workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-runner')
+        self.jobs = {}
+        self.active = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, key, label, func, *args, **kwargs):
+        with self._lock:
+            job = self.active.get(key)
+            if job is not None:
+                return job
+            job = Job(next(self._ids), key, label)
+            self.jobs[job.job_id] = job
+            self.active[key] = job
+            self._prune()
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, func, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            result = func(*args, progress_callback=job.report, **kwargs)
+            job.result = result
+            job.status = 'done'
+        except Exception as e:
+            print(f"Job {job.label} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self.active.pop(job.key, None)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
@@ -3,6 +3,7 @@ Sales Analytics System with ML Models and Premium Dashboard
 Production-level implementation with modular architecture
 """
 
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -14,9 +15,12 @@ warnings.filterwarnings('ignore')
 
 # Import custom modules
 from data_processor import DataProcessor
-from model_manager import ModelManager
-from dashboard_components import DashboardComponents
-from analytics_engine import AnalyticsEngine
+from model_manager import ModelManager, MODEL_CACHE_DIR
+from dashboard_components import (DashboardComponents, FigureCache, COMPACT_TEMPLATE, downsample_series,
+                                  top_n_with_other, bin_scatter)
+from analytics_engine import AnalyticsEngine, SalesCube, FilterIndex, DistinctCountCube, KPIAggregator, filter_key
+from job_runner import JobRunner
+from model_registry import ModelRegistry, MODEL_REGISTRY_DIR
 
 # Page configuration
 st.set_page_config(
@@ -315,6 +319,97 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_shared_dataset(csv_path, data_fingerprint):
+    """Load and preprocess the CSV once per process for all sessions.
+    
+    Keyed by the file's content hash so a changed file gets a fresh entry, and max_entries=1
+    evicts the stale one. Sessions hold references to the returned frame and must not mutate it.
+    """
+    data_processor = DataProcessor(csv_path)
+    if not data_processor.load_data():
+        return None
+    processed_df = data_processor.preprocess_data(lean=True)
+    if processed_df is None or processed_df.empty:
+        return None
+    cube = SalesCube(processed_df)
+    filter_index = FilterIndex(processed_df)
+    customer_sketches = DistinctCountCube(processed_df)
+    return {
+        'data_processor': data_processor,
+        'processed_df': processed_df,
+        'eda_summary': data_processor.get_eda_summary(),
+        'cube': cube,
+        'filter_index': filter_index,
+        'customer_sketches': customer_sketches,
+        'kpi_aggregator': KPIAggregator(cube, customer_sketches),
+        'figure_cache': FigureCache()
+    }
+
+# Models are compared on expanding-window folds over order dates, so the choice of best model is stable
+MODEL_CV = 'time_series'
+
+def model_cache_dir(data_processor):
+    return os.path.join(os.path.dirname(os.path.abspath(data_processor.filepath)), MODEL_CACHE_DIR)
+
+def model_registry(data_processor):
+    return ModelRegistry(os.path.join(os.path.dirname(os.path.abspath(data_processor.filepath)), MODEL_REGISTRY_DIR))
+
+def register_models(registry, model_manager, data_fingerprint):
+    """Record a fresh training run in the registry; a failure only costs the history entry"""
+    try:
+        registry.register(model_manager, data_fingerprint)
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not register trained models: {e}")
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_shared_models(data_fingerprint, _data_processor):
+    """Trained models shared by all sessions for one dataset, or None until they are trained.
+    
+    Only reads ModelManager's on-disk cache, so a page load never trains; training runs as a
+    background job when Retrain is clicked, and a restart loads its saved result.
+    """
+    X, y = _data_processor.prepare_model_data(target='TOTAL_PROFIT')
+    if X is None or y is None:
+        return None
+    model_manager = ModelManager()
+    results = model_manager.load_cached_training(data_fingerprint, X.columns, cache_dir=model_cache_dir(_data_processor),
+                                                 cv=MODEL_CV)
+    if results is None:
+        return None
+    model_manager.encoders = _data_processor.encoders
+    return model_manager, results
+
+# How often the sidebar polls running background jobs
+JOB_POLL_SECONDS = 2
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    """One worker queue per process, so a training job runs once whichever session asked for it"""
+    return JobRunner(max_workers=1)
+
+def retrain_models(X, y, dates, data_fingerprint, cache_dir, encoders, registry, progress_callback=None):
+    """Background task: fit a fresh ModelManager, overwrite the cached training result and
+    register the run"""
+    model_manager = ModelManager()
+    # Set before training so the cached artifact's manifest carries the encoders too
+    model_manager.encoders = encoders
+    results = model_manager.train_models_cached(
+        X, y, data_fingerprint, cache_dir=cache_dir, use_cache=False, progress_callback=progress_callback,
+        cv=MODEL_CV, dates=dates
+    )
+    register_models(registry, model_manager, data_fingerprint)
+    # Sessions attaching to the shared models from now on pick up the new fit
+    load_shared_models.clear()
+    return model_manager, results
+
+def tune_model(model_manager, X, y, model_choice, time_budget, progress_callback=None):
+    """Background task: tune one family on a copy of the session's models"""
+    if model_manager.hyperparameter_tuning(X, y, model_choice, time_budget=time_budget,
+                                           progress_callback=progress_callback) is None:
+        raise ValueError(f"{model_choice} cannot be tuned")
+    return model_manager
+
 class SalesAnalyticsDashboard:
     def __init__(self):
         # Use robust path detection for deployment
@@ -339,47 +434,134 @@ class SalesAnalyticsDashboard:
         
     def load_and_process_data(self):
         """Load and process the sales data"""
-        if 'processed_data' not in st.session_state:
-            with st.spinner("Loading and processing data..."):
-                # Load data
-                if self.data_processor.load_data():
-                    # Process data
-                    processed_df = self.data_processor.preprocess_data()
-                    if processed_df is not None and not processed_df.empty:
-                        st.session_state.processed_data = processed_df
-                        st.session_state.eda_summary = self.data_processor.get_eda_summary()
-                        return True
-                    else:
-                        st.error("No data loaded. Please check if the CSV file exists and is readable.")
-                        return False
-                else:
-                    st.error("No data loaded. Please check if the CSV file exists and is readable.")
-                    return False
+        try:
+            data_fingerprint = self.data_processor.get_fingerprint()['sha1']
+        except OSError:
+            st.error("No data loaded. Please check if the CSV file exists and is readable.")
+            return False
+        
+        with st.spinner("Loading and processing data..."):
+            shared = load_shared_dataset(self.data_processor.filepath, data_fingerprint)
+        if shared is None:
+            # Do not keep a failed load cached for other sessions
+            load_shared_dataset.clear()
+            st.error("No data loaded. Please check if the CSV file exists and is readable.")
+            return False
+        
+        # Reuse the process-wide processor so model training sees the already processed frame
+        self.data_processor = shared['data_processor']
+        
+        previous_fingerprint = st.session_state.get('data_fingerprint')
+        if previous_fingerprint != data_fingerprint:
+            if previous_fingerprint is not None:
+                # Source file changed: drop state derived from the old data
+                for key in ['filtered_rows', 'cube_cells', 'filter_state', 'filter_key', 'kpis', 'models_trained', 'model_results', 'trained_model_manager', 'last_tuning']:
+                    st.session_state.pop(key, None)
+            st.session_state.data_fingerprint = data_fingerprint
+        st.session_state.processed_data = shared['processed_df']
+        st.session_state.eda_summary = shared['eda_summary']
+        st.session_state.sales_cube = shared['cube']
+        st.session_state.filter_index = shared['filter_index']
+        st.session_state.customer_sketches = shared['customer_sketches']
+        st.session_state.kpi_aggregator = shared['kpi_aggregator']
+        self.dashboard_components.figure_cache = shared['figure_cache']
         return True
     
-    def train_models(self, force_retrain=False):
-        """Train ML models for profit prediction"""
-        if not force_retrain and 'models_trained' in st.session_state and st.session_state.models_trained:
+    def train_models(self):
+        """Attach the models trained for this data and shared by all sessions, if there are any.
+        Training only runs when Retrain is clicked, as a background job."""
+        if 'models_trained' in st.session_state and st.session_state.models_trained:
             return True
+        
+        data_fingerprint = self.data_processor.get_fingerprint()['sha1']
+        shared = load_shared_models(data_fingerprint, self.data_processor)
+        if shared is None:
+            return False
+        self.model_manager, results = shared
+        
+        st.session_state.model_results = results
+        st.session_state.models_trained = True
+        st.session_state.trained_model_manager = self.model_manager
+        return True
+    
+    def submit_job(self, key, label, kind, func, *args):
+        """Queue a background job and track it in this session until its result is applied"""
+        job = get_job_runner().submit(key, label, func, *args)
+        st.session_state.setdefault('pending_jobs', {})[job.job_id] = (kind, st.session_state.get('data_fingerprint'))
+        return job
+    
+    def submit_retrain(self):
+        """Retrain all models in the background; clicks from any session while it runs join the same job"""
+        X, y = self.data_processor.prepare_model_data(target='TOTAL_PROFIT')
+        if X is None or y is None:
+            st.error("Failed to prepare model data")
+            return None
+        data_fingerprint = self.data_processor.get_fingerprint()['sha1']
+        return self.submit_job(
+            f"retrain:{data_fingerprint}", "Retraining models", 'retrain', retrain_models,
+            X, y, self.data_processor.get_model_dates(), data_fingerprint, model_cache_dir(self.data_processor), self.data_processor.encoders,
+            model_registry(self.data_processor)
+        )
+    
+    def apply_job_result(self, job, kind):
+        """Swap a finished job's models into the session in one step"""
+        if kind == 'retrain':
+            model_manager, results = job.result
+            st.session_state.model_results = results
+            st.session_state.trained_model_manager = model_manager
+            st.session_state.models_trained = True
+            self.model_manager = model_manager
+            st.session_state.job_notice = ('success', f"Models retrained in {job.elapsed():.0f}s")
+        elif kind == 'tune':
+            model_manager = job.result
+            result = model_manager.tuning_results[model_manager.best_model_name]
+            st.session_state.trained_model_manager = model_manager
+            st.session_state.last_tuning = {
+                'model_name': result['model_name'],
+                'best_params': result['best_params'],
+                'best_score': result['best_score'],
+                'elapsed': result['elapsed']
+            }
+            st.session_state.job_notice = ('success', f"{result['model_name']} tuned in {result['elapsed']:.0f}s")
+    
+    def render_job_status(self):
+        """Show background jobs of this session, polling only while one is pending"""
+        notice = st.session_state.pop('job_notice', None)
+        if notice is not None:
+            level, message = notice
+            getattr(st.sidebar, level)(message)
+        
+        if st.session_state.get('pending_jobs'):
+            with st.sidebar:
+                st.fragment(run_every=JOB_POLL_SECONDS)(self.render_job_progress)()
+    
+    def render_job_progress(self):
+        runner = get_job_runner()
+        applied = False
+        for job_id, (kind, data_fingerprint) in list(st.session_state.pending_jobs.items()):
+            job = runner.get(job_id)
+            if job is None or job.finished:
+                st.session_state.pending_jobs.pop(job_id)
+                if job is None or data_fingerprint != st.session_state.get('data_fingerprint'):
+                    # Pruned, or trained on data that has since changed
+                    continue
+                if job.status == 'done':
+                    self.apply_job_result(job, kind)
+                else:
+                    st.session_state.job_notice = ('error', f"{job.label} failed: {job.error}")
+                applied = True
+                continue
             
-        with st.spinner("Training ML models..."):
-            # Ensure data is loaded first
-            if self.data_processor.df is None:
-                if not self.data_processor.load_data():
-                    st.error("No data loaded. Please check if the CSV file exists and is readable.")
-                    return False
-                self.data_processor.preprocess_data()
-                
-            X, y = self.data_processor.prepare_model_data(target='TOTAL_PROFIT')
-            if X is not None and y is not None:
-                results = self.model_manager.train_models(X, y, test_size=0.2)
-                st.session_state.model_results = results
-                st.session_state.models_trained = True
-                st.session_state.trained_model_manager = self.model_manager
-                return True
-            else:
-                st.error("Failed to prepare model data")
-                return False
+            eta = job.eta()
+            status = "waiting for a worker" if job.status == 'queued' else (
+                f"ETA {eta:.0f}s" if eta is not None else f"{job.elapsed():.0f}s elapsed")
+            st.progress(job.progress(), text=f"{job.label}: {status}")
+            if job.completed:
+                st.caption(f"Finished {len(job.completed)} of {job.total_steps}, last: {job.completed[-1]}")
+        
+        if applied:
+            # Rerun the whole page so every chart and table sees the new models
+            st.rerun()
     
     def render_sidebar(self):
         """Render enhanced sidebar with expert UI/UX design"""
@@ -396,7 +578,9 @@ class SalesAnalyticsDashboard:
             st.sidebar.error("No data loaded. Please check if the CSV file exists and is readable.")
             return None
             
-        df = st.session_state.processed_data
+        # Options and date bounds come from the filter index rather than scans of the frame
+        filter_index = st.session_state.filter_index
+        date_min, date_max = pd.Timestamp(filter_index.date_min), pd.Timestamp(filter_index.date_max)
         
         # Data Filters Section
         st.sidebar.markdown("""
@@ -412,54 +596,58 @@ class SalesAnalyticsDashboard:
             with st.expander("📅 Date Range", expanded=True):
                 date_range = st.date_input(
                     "Select Period",
-                    value=(df['ORDERDATE'].min(), df['ORDERDATE'].max()),
-                    min_value=df['ORDERDATE'].min(),
-                    max_value=df['ORDERDATE'].max()
+                    value=(date_min, date_max),
+                    min_value=date_min,
+                    max_value=date_max
                 )
             
             # Product line filter
             with st.expander("🏷️ Product Lines", expanded=False):
                 product_lines = st.multiselect(
                     "Choose Products",
-                    options=df['PRODUCTLINE'].unique().tolist(),
-                    default=df['PRODUCTLINE'].unique().tolist()
+                    options=filter_index.options['PRODUCTLINE'],
+                    default=filter_index.options['PRODUCTLINE']
                 )
             
             # Territory filter
             with st.expander("🌍 Territories", expanded=False):
                 territories = st.multiselect(
                     "Select Regions",
-                    options=df['TERRITORY'].unique().tolist(),
-                    default=df['TERRITORY'].unique().tolist()
+                    options=filter_index.options['TERRITORY'],
+                    default=filter_index.options['TERRITORY']
                 )
             
             # Deal size filter
             with st.expander("💼 Deal Sizes", expanded=False):
                 deal_sizes = st.multiselect(
                     "Filter by Size",
-                    options=df['DEALSIZE'].unique().tolist(),
-                    default=df['DEALSIZE'].unique().tolist()
+                    options=filter_index.options['DEALSIZE'],
+                    default=filter_index.options['DEALSIZE']
                 )
             
             # Customer segment filter
             with st.expander("👥 Customer Segments", expanded=False):
                 customer_segments = st.multiselect(
                     "Select Segments",
-                    options=df['CUSTOMER_SEGMENT'].unique().tolist(),
-                    default=df['CUSTOMER_SEGMENT'].unique().tolist()
+                    options=filter_index.options['CUSTOMER_SEGMENT'],
+                    default=filter_index.options['CUSTOMER_SEGMENT']
                 )
         
-        # Apply filters
-        filtered_df = df[
-            (df['ORDERDATE'] >= pd.to_datetime(date_range[0])) &
-            (df['ORDERDATE'] <= pd.to_datetime(date_range[1])) &
-            (df['PRODUCTLINE'].isin(product_lines)) &
-            (df['TERRITORY'].isin(territories)) &
-            (df['DEALSIZE'].isin(deal_sizes)) &
-            (df['CUSTOMER_SEGMENT'].isin(customer_segments))
-        ]
-        
-        st.session_state.filtered_data = filtered_df
+        # Apply filters: row positions from the index, and the same selection on the cube
+        filters = {
+            'PRODUCTLINE': product_lines,
+            'TERRITORY': territories,
+            'DEALSIZE': deal_sizes,
+            'CUSTOMER_SEGMENT': customer_segments
+        }
+        st.session_state.filter_state = (date_range[0], date_range[1], filters)
+        # Charts are cached per filter state under this key
+        st.session_state.filter_key = filter_key(date_range[0], date_range[1], filters)
+        st.session_state.filtered_rows = filter_index.select(date_range[0], date_range[1], filters)
+        st.session_state.cube_cells = st.session_state.sales_cube.select(date_range[0], date_range[1], filters)
+        # Computed once per filter state for Quick Stats and the KPI cards
+        kpis = st.session_state.kpi_aggregator.summary(date_range[0], date_range[1], filters)
+        st.session_state.kpis = kpis
         
         # ML Model Controls Section
         st.sidebar.markdown("""
@@ -478,9 +666,10 @@ class SalesAnalyticsDashboard:
             )
             
             if st.button("🔄 Retrain Models", help="Force retrain all models"):
-                st.session_state.models_trained = False
-                self.train_models(force_retrain=True)
-                st.success("Models retrained successfully!")
+                # Runs in the background; the current models stay in use until it finishes
+                self.submit_retrain()
+        
+        self.render_job_status()
         
         # Quick Stats
         st.sidebar.markdown("""
@@ -504,9 +693,9 @@ class SalesAnalyticsDashboard:
             </div>
         </div>
         """.format(
-            len(filtered_df),
-            filtered_df['SALES'].sum(),
-            filtered_df['SALES'].mean()
+            kpis['total_orders'],
+            kpis['total_sales'],
+            kpis['avg_order_value']
         ), unsafe_allow_html=True)
         
         return model_action
@@ -526,40 +715,41 @@ class SalesAnalyticsDashboard:
             st.error("No data loaded. Please check if the CSV file exists and is readable.")
             return
             
-        if 'filtered_data' not in st.session_state:
+        if 'filtered_rows' not in st.session_state:
             st.error("No filtered data available. Please check the sidebar filters.")
             return
             
-        df = st.session_state.filtered_data
+        rows = st.session_state.filtered_rows
+        cells = st.session_state.cube_cells
         
         # KPI Section
-        self.render_kpi_section(df)
+        self.render_kpi_section(st.session_state.kpis)
         
         # Charts Section
         col1, col2 = st.columns([1, 1], gap="medium")
         
         with col1:
-            self.render_sales_trend_chart(df)
+            self.render_sales_trend_chart(cells)
             st.markdown("<div style='margin-bottom: 2rem;'></div>", unsafe_allow_html=True)
-            self.render_product_performance_chart(df)
+            self.render_product_performance_chart(cells)
         
         with col2:
-            self.render_territory_analysis_chart(df)
+            self.render_territory_analysis_chart(cells)
             st.markdown("<div style='margin-bottom: 2rem;'></div>", unsafe_allow_html=True)
-            self.render_customer_analysis_chart(df)
+            self.render_customer_analysis_chart(cells)
         
         # Detailed Analytics
-        self.render_detailed_analytics(df)
+        self.render_detailed_analytics(rows, cells)
     
-    def render_kpi_section(self, df):
+    def render_kpi_section(self, kpis):
         """Render enhanced KPI metrics section"""
         
-        # Calculate metrics
-        total_sales = df['SALES'].sum()
-        total_orders = len(df)
-        avg_order_value = df['SALES'].mean()
-        total_customers = df['CUSTOMERNAME'].nunique()
-        total_profit = df['TOTAL_PROFIT'].sum() if 'TOTAL_PROFIT' in df.columns else 0
+        # Metrics computed by the sidebar for the current filters
+        total_sales = kpis['total_sales']
+        total_orders = kpis['total_orders']
+        avg_order_value = kpis['avg_order_value']
+        total_customers = kpis['unique_customers']
+        total_profit = kpis['total_profit']
         
         # Create columns with equal spacing
         col1, col2, col3, col4, col5 = st.columns(5)
@@ -612,275 +802,304 @@ class SalesAnalyticsDashboard:
         # Add bottom padding
         st.markdown("<div style='padding-bottom: 3rem;'></div>", unsafe_allow_html=True)
     
-    def render_sales_trend_chart(self, df):
+    def render_sales_trend_chart(self, cells):
         """Render sales trend over time"""
         st.markdown("### 📊 Sales Trend Analysis")
         
-        # Monthly sales trend
-        monthly_sales = df.groupby(df['ORDERDATE'].dt.to_period('M'))['SALES'].sum().reset_index()
-        monthly_sales['ORDERDATE'] = monthly_sales['ORDERDATE'].astype(str)
+        def build():
+            # Monthly sales trend
+            monthly_sales = downsample_series(st.session_state.sales_cube.rollup(cells, 'MONTH')).reset_index()
+            monthly_sales['MONTH'] = monthly_sales['MONTH'].astype(str)
+            
+            fig = px.line(
+                monthly_sales, 
+                x='MONTH', 
+                y='SALES',
+                title="Monthly Sales Trend",
+                template=COMPACT_TEMPLATE,
+                labels={'MONTH': 'ORDERDATE'}
+            )
+            fig.update_layout(
+                height=400,
+                margin=dict(l=20, r=20, t=40, b=20)
+            )
+            fig.update_traces(line_color='#00E676')
+            return fig
         
-        fig = px.line(
-            monthly_sales, 
-            x='ORDERDATE', 
-            y='SALES',
-            title="Monthly Sales Trend",
-            template="plotly_dark"
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
-            height=400,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        fig.update_traces(line_color='#00E676')
-        st.plotly_chart(fig, use_container_width=True)
+        self.dashboard_components.plotly_chart('sales_trend', st.session_state.filter_key, build, width='stretch')
     
-    def render_product_performance_chart(self, df):
+    def render_product_performance_chart(self, cells):
         """Render product line performance"""
         st.markdown("### 🏷️ Product Performance")
         
-        product_sales = df.groupby('PRODUCTLINE')['SALES'].sum().sort_values(ascending=True).reset_index()
+        def build():
+            product_sales = top_n_with_other(st.session_state.sales_cube.rollup(cells, 'PRODUCTLINE'))
+            product_sales = product_sales.sort_values(ascending=True).rename_axis('PRODUCTLINE').reset_index()
+            
+            fig = px.bar(
+                product_sales,
+                x='SALES',
+                y='PRODUCTLINE',
+                orientation='h',
+                title="Sales by Product Line",
+                template=COMPACT_TEMPLATE
+            )
+            fig.update_layout(
+                height=400,
+                margin=dict(l=20, r=20, t=40, b=20)
+            )
+            fig.update_traces(marker_color='#FF6B35')
+            return fig
         
-        fig = px.bar(
-            product_sales,
-            x='SALES',
-            y='PRODUCTLINE',
-            orientation='h',
-            title="Sales by Product Line",
-            template="plotly_dark"
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
-            height=400,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        fig.update_traces(marker_color='#FF6B35')
-        st.plotly_chart(fig, use_container_width=True)
+        self.dashboard_components.plotly_chart('product_performance', st.session_state.filter_key, build, width='stretch')
     
-    def render_territory_analysis_chart(self, df):
+    def render_territory_analysis_chart(self, cells):
         """Render territory analysis"""
         st.markdown("### 🌍 Territory Analysis")
         
-        territory_sales = df.groupby('TERRITORY')['SALES'].sum()
+        def build():
+            territory_sales = top_n_with_other(st.session_state.sales_cube.rollup(cells, 'TERRITORY'))
+            
+            fig = px.pie(
+                values=territory_sales.values,
+                names=territory_sales.index,
+                title="Sales Distribution by Territory",
+                template=COMPACT_TEMPLATE
+            )
+            fig.update_layout(
+                height=400,
+                margin=dict(l=20, r=20, t=40, b=20)
+            )
+            fig.update_traces(marker=dict(colors=['#9C27B0', "#E6E91E", '#F44336', '#FF9800', '#4CAF50']))
+            return fig
         
-        fig = px.pie(
-            values=territory_sales.values,
-            names=territory_sales.index,
-            title="Sales Distribution by Territory",
-            template="plotly_dark"
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
-            height=400,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        fig.update_traces(marker=dict(colors=['#9C27B0', "#E6E91E", '#F44336', '#FF9800', '#4CAF50']))
-        st.plotly_chart(fig, use_container_width=True)
+        self.dashboard_components.plotly_chart('territory_analysis', st.session_state.filter_key, build, width='stretch')
     
-    def render_customer_analysis_chart(self, df):
+    def render_customer_analysis_chart(self, cells):
         """Render customer segment analysis"""
         st.markdown("### 👥 Customer Segment Analysis")
         
-        segment_sales = df.groupby('CUSTOMER_SEGMENT')['SALES'].sum()
+        def build():
+            segment_sales = st.session_state.sales_cube.rollup(cells, 'CUSTOMER_SEGMENT')
+            
+            fig = px.bar(
+                x=segment_sales.index,
+                y=segment_sales.values,
+                title="Sales by Customer Segment",
+                template=COMPACT_TEMPLATE,
+                labels={'x': 'Customer Segment', 'y': 'Sales ($)'}
+            )
+            fig.update_layout(
+                xaxis_title='Customer Segment',
+                yaxis_title='Sales ($)',
+                height=400,
+                margin=dict(l=20, r=20, t=40, b=20)
+            )
+            fig.update_traces(marker_color='#00BCD4')
+            return fig
         
-        fig = px.bar(
-            x=segment_sales.index,
-            y=segment_sales.values,
-            title="Sales by Customer Segment",
-            template="plotly_dark",
-            labels={'x': 'Customer Segment', 'y': 'Sales ($)'}
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
-            xaxis_title='Customer Segment',
-            yaxis_title='Sales ($)',
-            height=400,
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        fig.update_traces(marker_color='#00BCD4')
-        st.plotly_chart(fig, use_container_width=True)
+        self.dashboard_components.plotly_chart('customer_segments', st.session_state.filter_key, build, width='stretch')
     
-    def render_detailed_analytics(self, df):
+    def render_detailed_analytics(self, rows, cells):
         """Render detailed analytics section"""
         st.markdown("## 🔍 Detailed Analytics")
         
         tab1, tab2, tab3, tab4 = st.tabs(["📊 Sales Analysis", "🎯 Customer Insights", "📦 Product Insights", "📈 Trend Analysis"])
         
         with tab1:
-            self.render_sales_analysis(df)
+            self.render_sales_analysis(cells)
         
         with tab2:
-            self.render_customer_insights(df)
+            self.render_customer_insights(rows)
         
         with tab3:
-            self.render_product_insights(df)
+            self.render_product_insights(rows)
         
         with tab4:
-            self.render_trend_analysis(df)
+            self.render_trend_analysis(cells)
     
-    def render_sales_analysis(self, df):
+    def render_sales_analysis(self, cells):
         """Render detailed sales analysis"""
+        cube = st.session_state.sales_cube
+        key = st.session_state.filter_key
         col1, col2 = st.columns(2)
         
         with col1:
-            # Sales by deal size
-            deal_size_sales = df.groupby('DEALSIZE')['SALES'].sum().reset_index()
-            fig = px.bar(
-                deal_size_sales,
-                x='DEALSIZE',
-                y='SALES',
-                title="Sales by Deal Size",
-                template="plotly_dark",
-                labels={'DEALSIZE': 'Deal Size', 'SALES': 'Sales ($)'}
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis_title='Deal Size',
-                yaxis_title='Sales ($)'
-            )
-            fig.update_traces(marker_color='#FFC107')
-            st.plotly_chart(fig, width='stretch')
+            def build_deal_sizes():
+                # Sales by deal size
+                deal_size_sales = cube.rollup(cells, 'DEALSIZE').reset_index()
+                fig = px.bar(
+                    deal_size_sales,
+                    x='DEALSIZE',
+                    y='SALES',
+                    title="Sales by Deal Size",
+                    template=COMPACT_TEMPLATE,
+                    labels={'DEALSIZE': 'Deal Size', 'SALES': 'Sales ($)'}
+                )
+                fig.update_layout(
+                    xaxis_title='Deal Size',
+                    yaxis_title='Sales ($)'
+                )
+                fig.update_traces(marker_color='#FFC107')
+                return fig
+            
+            self.dashboard_components.plotly_chart('deal_sizes', key, build_deal_sizes, width='stretch')
         
         with col2:
-            # Sales by status
-            status_sales = df.groupby('STATUS')['SALES'].sum()
-            fig = px.pie(
-                values=status_sales.values,
-                names=status_sales.index,
-                title="Sales by Order Status",
-                template="plotly_dark"
-            )
-            st.plotly_chart(fig, width='stretch')
+            def build_statuses():
+                # Sales by status
+                status_sales = top_n_with_other(cube.rollup(cells, 'STATUS'))
+                return px.pie(
+                    values=status_sales.values,
+                    names=status_sales.index,
+                    title="Sales by Order Status",
+                    template=COMPACT_TEMPLATE
+                )
+            
+            self.dashboard_components.plotly_chart('order_statuses', key, build_statuses, width='stretch')
     
-    def render_customer_insights(self, df):
+    def render_customer_insights(self, rows):
         """Render customer insights"""
-        # Top customers
-        top_customers = df.groupby('CUSTOMERNAME')['SALES'].sum().nlargest(10)
-        
-        fig = px.bar(
-            x=top_customers.values,
-            y=top_customers.index,
-            orientation='h',
-            title="Top 10 Customers by Sales",
-            template="plotly_dark",
-            labels={'x': 'Sales ($)', 'y': 'Customer Name'}
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis_title='Sales ($)',
-            yaxis_title='Customer Name'
-        )
-        fig.update_traces(marker_color='#8BC34A')
-        st.plotly_chart(fig, width='stretch')
-        
-        # Customer distribution by country
-        country_customers = df.groupby('COUNTRY')['CUSTOMERNAME'].nunique().sort_values(ascending=False)
-        
-        fig = px.bar(
-            x=country_customers.index[:10],
-            y=country_customers.values[:10],
-            title="Top 10 Countries by Customer Count",
-            template="plotly_dark",
-            labels={'x': 'Country', 'y': 'Customer Count'}
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis_title='Country',
-            yaxis_title='Customer Count'
-        )
-        fig.update_traces(marker_color='#FF5722')
-        st.plotly_chart(fig, width='stretch')
-    
-    def render_product_insights(self, df):
-        """Render product insights"""
-        col1, col2 = st.columns(2)
+        filter_index = st.session_state.filter_index
+        key = st.session_state.filter_key
         
-        with col1:
-            # Top products by sales
-            top_products = df.groupby('PRODUCTCODE')['SALES'].sum().nlargest(10)
+        def build_top_customers():
+            # Top customers
+            top_customers = filter_index.sum_by(rows, 'CUSTOMERNAME').nlargest(10)
+            
             fig = px.bar(
-                x=top_products.values,
-                y=top_products.index,
+                x=top_customers.values,
+                y=top_customers.index,
                 orientation='h',
-                title="Top 10 Products by Sales",
-                template="plotly_dark",
-                labels={'x': 'Sales ($)', 'y': 'Product Code'}
+                title="Top 10 Customers by Sales",
+                template=COMPACT_TEMPLATE,
+                labels={'x': 'Sales ($)', 'y': 'Customer Name'}
             )
             fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
                 xaxis_title='Sales ($)',
-                yaxis_title='Product Code'
+                yaxis_title='Customer Name'
             )
-            fig.update_traces(marker_color='#673AB7')
-            st.plotly_chart(fig, width='stretch')
+            fig.update_traces(marker_color='#8BC34A')
+            return fig
+        
+        self.dashboard_components.plotly_chart('top_customers', key, build_top_customers, width='stretch')
+        
+        def build_countries():
+            # Customer distribution by country, from the merged customer sketches: exact for small
+            # customer bases, estimated for large ones
+            start, end, filters = st.session_state.filter_state
+            country_customers = st.session_state.customer_sketches.count_distinct_by(
+                'COUNTRY', start, end, filters
+            ).sort_values(ascending=False)
+            
+            fig = px.bar(
+                x=country_customers.index[:10],
+                y=country_customers.values[:10],
+                title="Top 10 Countries by Customer Count",
+                template=COMPACT_TEMPLATE,
+                labels={'x': 'Country', 'y': 'Customer Count'}
+            )
+            fig.update_layout(
+                xaxis_title='Country',
+                yaxis_title='Customer Count'
+            )
+            fig.update_traces(marker_color='#FF5722')
+            return fig
+        
+        self.dashboard_components.plotly_chart('country_customers', key, build_countries, width='stretch')
+    
+    def render_product_insights(self, rows):
+        """Render product insights"""
+        filter_index = st.session_state.filter_index
+        key = st.session_state.filter_key
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            def build_top_products():
+                # Top products by sales
+                top_products = filter_index.sum_by(rows, 'PRODUCTCODE').nlargest(10)
+                fig = px.bar(
+                    x=top_products.values,
+                    y=top_products.index,
+                    orientation='h',
+                    title="Top 10 Products by Sales",
+                    template=COMPACT_TEMPLATE,
+                    labels={'x': 'Sales ($)', 'y': 'Product Code'}
+                )
+                fig.update_layout(
+                    xaxis_title='Sales ($)',
+                    yaxis_title='Product Code'
+                )
+                fig.update_traces(marker_color='#673AB7')
+                return fig
+            
+            self.dashboard_components.plotly_chart('top_products', key, build_top_products, width='stretch')
         
         with col2:
-            # Product quantity vs sales
-            product_metrics = df.groupby('PRODUCTCODE').agg({
-                'QUANTITYORDERED': 'sum',
-                'SALES': 'sum'
-            }).reset_index()
+            def build_product_scatter():
+                # Product quantity vs sales; large product catalogues are binned on a grid
+                product_metrics = pd.DataFrame({
+                    'QUANTITYORDERED': filter_index.sum_by(rows, 'PRODUCTCODE', 'QUANTITYORDERED'),
+                    'SALES': filter_index.sum_by(rows, 'PRODUCTCODE')
+                })
+                points, binned = bin_scatter(product_metrics, 'QUANTITYORDERED', 'SALES')
+                
+                fig = px.scatter(
+                    points,
+                    x='QUANTITYORDERED',
+                    y='SALES',
+                    size='count' if binned else None,
+                    title="Product Quantity vs Sales" + (" (products per cell)" if binned else ""),
+                    template=COMPACT_TEMPLATE
+                )
+                return fig
             
-            fig = px.scatter(
-                product_metrics,
-                x='QUANTITYORDERED',
-                y='SALES',
-                title="Product Quantity vs Sales",
-                template="plotly_dark"
-            )
-            st.plotly_chart(fig, width='stretch')
+            self.dashboard_components.plotly_chart('product_scatter', key, build_product_scatter, width='stretch')
     
-    def render_trend_analysis(self, df):
+    def render_trend_analysis(self, cells):
         """Render trend analysis"""
-        # Quarterly trends
-        quarterly_sales = df.groupby('QTR_ID')['SALES'].sum()
-        
-        fig = px.line(
-            x=quarterly_sales.index,
-            y=quarterly_sales.values,
-            title="Quarterly Sales Trend",
-            template="plotly_dark",
-            labels={'x': 'Quarter', 'y': 'Sales ($)'}
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis_title='Quarter',
-            yaxis_title='Sales ($)'
-        )
-        fig.update_traces(line_color='#E91E63')
-        st.plotly_chart(fig, width='stretch')
+        cube = st.session_state.sales_cube
+        key = st.session_state.filter_key
+        
+        def build_quarters():
+            # Quarterly trends
+            quarterly_sales = downsample_series(cube.rollup(cells, 'QTR_ID'))
+            
+            fig = px.line(
+                x=quarterly_sales.index,
+                y=quarterly_sales.values,
+                title="Quarterly Sales Trend",
+                template=COMPACT_TEMPLATE,
+                labels={'x': 'Quarter', 'y': 'Sales ($)'}
+            )
+            fig.update_layout(
+                xaxis_title='Quarter',
+                yaxis_title='Sales ($)'
+            )
+            fig.update_traces(line_color='#E91E63')
+            return fig
         
-        # Year-over-year comparison
-        yearly_sales = df.groupby('YEAR_ID')['SALES'].sum()
+        self.dashboard_components.plotly_chart('quarterly_trend', key, build_quarters, width='stretch')
         
-        fig = px.bar(
-            x=yearly_sales.index,
-            y=yearly_sales.values,
-            title="Year-over-Year Sales",
-            template="plotly_dark",
-            labels={'x': 'Year', 'y': 'Sales ($)'}
-        )
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            xaxis_title='Year',
-            yaxis_title='Sales ($)'
-        )
-        fig.update_traces(marker_color='#009688')
-        st.plotly_chart(fig, width='stretch')
+        def build_years():
+            # Year-over-year comparison
+            yearly_sales = cube.rollup(cells, 'YEAR_ID')
+            
+            fig = px.bar(
+                x=yearly_sales.index,
+                y=yearly_sales.values,
+                title="Year-over-Year Sales",
+                template=COMPACT_TEMPLATE,
+                labels={'x': 'Year', 'y': 'Sales ($)'}
+            )
+            fig.update_layout(
+                xaxis_title='Year',
+                yaxis_title='Sales ($)'
+            )
+            fig.update_traces(marker_color='#009688')
+            return fig
+        
+        self.dashboard_components.plotly_chart('yearly_sales', key, build_years, width='stretch')
     
     def render_ml_section(self, model_action):
         """Render ML model section"""
@@ -921,7 +1140,7 @@ class SalesAnalyticsDashboard:
                     x='index',
                     y='R2_Score',
                     title="Model Performance Comparison (R² Score)",
-                    template="plotly_dark"
+                    template=COMPACT_TEMPLATE
                 )
                 fig.update_xaxes(title="Model")
                 fig.update_yaxes(title="R² Score")
@@ -930,6 +1149,34 @@ class SalesAnalyticsDashboard:
                 st.info("No model performance data available.")
         except Exception as e:
             st.error(f"Error loading model performance: {str(e)}")
+        
+        self.render_model_history()
+    
+    def render_model_history(self):
+        """Registered training runs, read from the registry index without loading any model"""
+        st.markdown("### 🗂️ Model History")
+        registry = model_registry(self.data_processor)
+        versions_df = registry.list_versions()
+        if versions_df.empty:
+            st.info("No training runs registered yet. Retrain the models to start the history.")
+            return
+        
+        st.dataframe(versions_df.set_index('Version').sort_index(ascending=False), width='stretch')
+        with st.expander("Compare all models across versions"):
+            st.dataframe(registry.compare(), width='stretch')
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            version = st.selectbox("Version", versions_df['Version'].tolist()[::-1])
+        with col2:
+            st.markdown("<div style='margin-top: 1.75rem;'></div>", unsafe_allow_html=True)
+            activate = st.button("Activate Version", help="Use this version's best model and mark it as production")
+        if activate:
+            # Only the manifest is read here; the model loads on its first prediction
+            st.session_state.trained_model_manager = registry.load(version)
+            st.session_state.models_trained = True
+            registry.promote(version)
+            st.success(f"Version {version} is now active")
     
     def render_predictions(self):
         """Render strategic business intelligence interface"""
@@ -959,7 +1206,7 @@ class SalesAnalyticsDashboard:
         st.markdown("#### 🏆 Product Line Optimization")
         
         # Calculate product metrics
-        product_metrics = df.groupby('PRODUCTLINE').agg({
+        product_metrics = df.groupby('PRODUCTLINE', observed=True).agg({
             'TOTAL_PROFIT': ['sum', 'mean'],
             'SALES': 'sum'
         }).round(2)
@@ -997,7 +1244,7 @@ class SalesAnalyticsDashboard:
         st.markdown("#### 🌍 Geographic Strategy")
         
         # Territory analysis
-        territory_metrics = df.groupby('TERRITORY').agg({
+        territory_metrics = df.groupby('TERRITORY', observed=True).agg({
             'TOTAL_PROFIT': 'sum',
             'SALES': 'sum'
         }).round(2)
@@ -1021,7 +1268,7 @@ class SalesAnalyticsDashboard:
             x='TERRITORY',
             y='TOTAL_PROFIT',
             title="Profit by Territory",
-            template="plotly_dark"
+            template=COMPACT_TEMPLATE
         )
         st.plotly_chart(fig, width='stretch')
     
@@ -1037,7 +1284,7 @@ class SalesAnalyticsDashboard:
         
         if st.button("Calculate Impact"):
             if "best product" in scenario:
-                best_product = df.groupby('PRODUCTLINE')['TOTAL_PROFIT'].sum().idxmax()
+                best_product = df.groupby('PRODUCTLINE', observed=True)['TOTAL_PROFIT'].sum().idxmax()
                 current_profit = df[df['PRODUCTLINE'] == best_product]['TOTAL_PROFIT'].sum()
                 impact = current_profit * 0.20
                 
@@ -1089,7 +1336,7 @@ class SalesAnalyticsDashboard:
                 y='Feature',
                 orientation='h',
                 title="Feature Importance (Best Model)",
-                template="plotly_dark"
+                template=COMPACT_TEMPLATE
             )
             st.plotly_chart(fig, width='stretch')
         else:
@@ -1105,34 +1352,30 @@ class SalesAnalyticsDashboard:
             
         model_choice = st.selectbox(
             "Select Model for Tuning",
-            ["Random Forest", "XGBoost", "LightGBM"]
+            ["Random Forest", "Gradient Boosting", "XGBoost", "LightGBM"]
+        )
+        time_budget = st.number_input(
+            "Time Budget (seconds)", min_value=10, max_value=3600, value=120, step=10,
+            help="No new candidate fits start once this is spent; the final refit on all rows runs after it"
         )
         
         if st.button("Start Hyperparameter Tuning"):
-            with st.spinner(f"Tuning {model_choice} hyperparameters..."):
-                # Ensure data is loaded
-                if self.data_processor.df is None:
-                    if not self.data_processor.load_data():
-                        st.error("No data loaded. Please check if the CSV file exists and is readable.")
-                        return
-                    self.data_processor.preprocess_data()
-                
-                X, y = self.data_processor.prepare_model_data(target='TOTAL_PROFIT')
-                if X is not None and y is not None:
-                    # Use trained model manager if available
-                    if 'trained_model_manager' in st.session_state:
-                        trained_model = st.session_state.trained_model_manager
-                        best_model = trained_model.hyperparameter_tuning(X, y, model_choice)
-                    else:
-                        best_model = self.model_manager.hyperparameter_tuning(X, y, model_choice)
-                    
-                    if best_model:
-                        st.success("Hyperparameter tuning completed!")
-                        st.info("Best model has been updated in the model manager")
-                    else:
-                        st.error("Hyperparameter tuning failed")
-                else:
-                    st.error("Failed to prepare model data for hyperparameter tuning")
+            X, y = self.data_processor.prepare_model_data(target='TOTAL_PROFIT')
+            if X is not None and y is not None:
+                # Tune a session-local copy; the trained manager may be shared with other sessions
+                base_manager = st.session_state.trained_model_manager
+                key = f"tune:{st.session_state.data_fingerprint}:{model_choice}:{time_budget}:{id(base_manager)}"
+                self.submit_job(key, f"Tuning {model_choice}", 'tune', tune_model,
+                                base_manager.copy(), X, y, model_choice, time_budget)
+                st.info("Tuning runs in the background; progress is shown in the sidebar")
+            else:
+                st.error("Failed to prepare model data for hyperparameter tuning")
+        
+        result = st.session_state.get('last_tuning')
+        if result is not None:
+            st.success(f"{result['model_name']} tuned in {result['elapsed']:.0f}s "
+                       f"(CV R² {result['best_score']:.4f}); it is now the active model")
+            st.json(result['best_params'])
     
     def run(self):
         """Main application runner"""
@@ -1140,6 +1383,9 @@ class SalesAnalyticsDashboard:
         if not self.load_and_process_data():
             st.stop()
         
+        # Attach already trained shared models; training waits for the Retrain button
+        self.train_models()
+        
         # Render sidebar and get model action
         model_action = self.render_sidebar()
         
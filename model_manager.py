@@ -1,12 +1,22 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import xgboost as xgb
 import joblib
+from joblib import Parallel, delayed
+from encoders import EncoderRegistry
+from tuning import HyperparameterTuner, TUNING_ALIASES
+from evaluation import ModelEvaluator
+from training_data import TrainingData, as_feature_matrix, FEATURE_DTYPE
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,6 +28,85 @@ except ImportError:
     LIGHTGBM_AVAILABLE = False
     print("LightGBM not available due to compatibility issues")
 
+MODEL_CACHE_DIR = '.model_cache'
+
+# Models that fit on a single core; every other model gets a share of the remaining core budget
+SINGLE_THREADED_MODELS = ['Linear_Regression', 'Gradient_Boosting']
+
+# Rows per predict call when forecasting many series
+PREDICT_BATCH_ROWS = 100000
+
+# Model artifacts are directories holding this manifest next to the serialized model
+MANIFEST_NAME = 'manifest.json'
+ARTIFACT_VERSION = 1
+
+class LightGBMBoosterModel:
+    """Regressor interface over a LightGBM Booster restored from its native text format"""
+    def __init__(self, booster):
+        self.booster = booster
+    
+    def predict(self, X):
+        return self.booster.predict(X)
+    
+    @property
+    def feature_importances_(self):
+        return self.booster.feature_importance()
+    
+    def get_params(self):
+        return {}
+
+def load_artifact_model(filepath, manifest, mmap_mode=None):
+    """Deserialize the model of an artifact directory whose manifest was already read"""
+    model_path = os.path.join(filepath, manifest['model_file'])
+    if manifest['model_format'] == 'xgboost':
+        model = xgb.XGBRegressor()
+        model.load_model(model_path)
+        return model
+    if manifest['model_format'] == 'lightgbm':
+        if not LIGHTGBM_AVAILABLE:
+            raise ImportError("This model was saved from LightGBM, which is not available")
+        return LightGBMBoosterModel(lgb.Booster(model_file=model_path))
+    return joblib.load(model_path, mmap_mode=mmap_mode if not manifest.get('compress') else None)
+
+def scaler_from_manifest(manifest):
+    """Rebuild the fitted StandardScaler from its parameters in a manifest"""
+    scaler = StandardScaler()
+    params = manifest.get('scaler')
+    if params:
+        scaler.mean_ = np.array(params['mean'])
+        scaler.scale_ = np.array(params['scale'])
+        scaler.var_ = np.array(params['var'])
+        scaler.n_samples_seen_ = params['n_samples_seen']
+        scaler.n_features_in_ = len(params['mean'])
+        if params.get('feature_names'):
+            scaler.feature_names_in_ = np.array(params['feature_names'], dtype=object)
+    return scaler
+
+class LazyModel:
+    """Stands in for a saved model and deserializes it on first use"""
+    def __init__(self, filepath, manifest, mmap_mode=None):
+        self.filepath = filepath
+        self.manifest = manifest
+        self.mmap_mode = mmap_mode
+        self._model = None
+    
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_artifact_model(self.filepath, self.manifest, self.mmap_mode)
+            print(f"Model {self.manifest['model_name']} loaded from {self.filepath}")
+        return self._model
+    
+    def predict(self, X):
+        return self.model.predict(X)
+    
+    @property
+    def feature_importances_(self):
+        return self.model.feature_importances_
+    
+    def get_params(self):
+        return self.model.get_params()
+
 class ModelManager:
     def __init__(self):
         self.models = {}
@@ -25,10 +114,14 @@ class ModelManager:
         self.scaler = StandardScaler()
         self.best_model = None
         self.best_model_name = None
+        self.encoders = None
+        self.tuning_results = {}
+        self.feature_names = None
+        self.evaluator = None
         
-    def initialize_models(self):
-        """Initialize different ML models for comparison"""
-        self.models = {
+    def build_models(self):
+        """Unfitted models to compare, by name"""
+        models = {
             'Linear_Regression': LinearRegression(),
             'Random_Forest': RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1),
             'Gradient_Boosting': GradientBoostingRegressor(n_estimators=100, random_state=42),
@@ -37,50 +130,199 @@ class ModelManager:
         
         # Add LightGBM only if available
         if LIGHTGBM_AVAILABLE:
-            self.models['LightGBM'] = lgb.LGBMRegressor(n_estimators=100, random_state=42, n_jobs=-1, verbose=-1)
+            models['LightGBM'] = lgb.LGBMRegressor(n_estimators=100, random_state=42, n_jobs=-1, verbose=-1)
+        return models
+    
+    def initialize_models(self):
+        """Initialize different ML models for comparison"""
+        self.models = self.build_models()
         
-    def train_models(self, X, y, test_size=0.2):
-        """Train all models and evaluate performance"""
-        from sklearn.model_selection import train_test_split
+    def training_cache_key(self, data_fingerprint, feature_names, test_size=0.2, cv=None):
+        """Hash of everything that determines training results: data, features, hyperparameters
+        and the evaluation scheme. Leaves self.models untouched."""
+        config = {
+            'data': data_fingerprint,
+            'features': list(feature_names),
+            'test_size': test_size,
+            'dtype': np.dtype(FEATURE_DTYPE).name,
+            'models': {name: model.get_params() for name, model in self.build_models().items()}
+        }
+        if cv is not None:
+            config['cv'] = cv.config() if isinstance(cv, ModelEvaluator) else cv
+        return hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def load_cached_training(self, data_fingerprint, feature_names, cache_dir=MODEL_CACHE_DIR, test_size=0.2, cv=None):
+        """Load the saved result of an identical training run; None when there is none. Never trains."""
+        path = os.path.join(cache_dir, self.training_cache_key(data_fingerprint, feature_names, test_size, cv))
+        if not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            return None
+        self.load_model(path)
+        return {
+            'performance': self.model_performance,
+            'best_model': self.best_model_name,
+            'best_score': self.model_performance[self.best_model_name]['R2_Score'],
+            'from_cache': True
+        }
+    
+    def train_models_cached(self, X, y, data_fingerprint, cache_dir=MODEL_CACHE_DIR, test_size=0.2, use_cache=True,
+                            progress_callback=None, cv=None, dates=None):
+        """Load the saved result of an identical training run, or train and save one"""
+        if use_cache:
+            cached = self.load_cached_training(data_fingerprint, X.columns, cache_dir, test_size, cv)
+            if cached is not None:
+                return cached
+        
+        path = os.path.join(cache_dir, self.training_cache_key(data_fingerprint, X.columns, test_size, cv))
+        results = self.train_models(X, y, test_size=test_size, progress_callback=progress_callback, cv=cv, dates=dates)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial artifact
+            staging = tempfile.mkdtemp(dir=cache_dir, suffix='.tmp')
+            self.save_model(staging)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(staging, path)
+        except OSError as e:
+            print(f"Warning: could not cache trained models: {e}")
+        return results
+    
+    def copy(self):
+        """Shallow copy whose model dicts can be changed without affecting a shared instance"""
+        clone = ModelManager.__new__(ModelManager)
+        clone.__dict__.update(self.__dict__)
+        clone.models = dict(self.models)
+        clone.model_performance = dict(self.model_performance)
+        clone.tuning_results = dict(self.tuning_results)
+        return clone
+    
+    def uses_unscaled_features(self, name):
+        """Boosted tree libraries are trained on raw features, the rest on standardized ones"""
+        return name in ['XGBoost'] or (name == 'LightGBM' and LIGHTGBM_AVAILABLE)
+    
+    def allocate_cores(self, n_jobs=None):
+        """Split a core budget across the models so concurrent fits do not oversubscribe.
+        
+        Single-threaded models take one core each and the multi-threaded ensembles share the
+        rest evenly. Returns how many fits to run at once.
+        """
+        total = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 1 else n_jobs
+        threaded = [name for name in self.models if name not in SINGLE_THREADED_MODELS]
+        single = len(self.models) - len(threaded)
+        per_model = max(1, (total - single) // len(threaded)) if threaded else 1
+        for name in threaded:
+            self.models[name].set_params(n_jobs=per_model)
+        return max(1, min(total, len(self.models)))
+    
+    def _fit_and_score(self, name, model, data):
+        print(f"Training {name}...")
         
+        # Train model on the shared float32 buffers
+        if self.uses_unscaled_features(name):
+            model.fit(data.X_train, data.y_train)
+            y_pred = model.predict(data.X_test)
+        else:
+            model.fit(data.X_train_scaled, data.y_train)
+            y_pred = model.predict(data.X_test_scaled)
+        y_test = data.y_test
+        
+        # Calculate metrics
+        mse = mean_squared_error(y_test, y_pred)
+        rmse = np.sqrt(mse)
+        mae = mean_absolute_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
+        
+        print(f"{name} - RMSE: {rmse:.2f}, R2: {r2:.4f}")
+        return name, {
+            'MSE': mse,
+            'RMSE': rmse,
+            'MAE': mae,
+            'R2_Score': r2,
+            'Model': model
+        }
+    
+    def train_models(self, X, y, test_size=0.2, n_jobs=None, backend='threading', progress_callback=None,
+                     cv=None, dates=None):
+        """Train all models concurrently within a core budget and evaluate performance.
+        
+        n_jobs is the total number of cores to use (all by default, 1 fits one model at a
+        time). The threading backend shares the training arrays between fits; the tree
+        builders, lstsq and the boosting libraries release the GIL while fitting. Pass
+        backend='loky' to fit in worker processes instead. progress_callback, if given, is
+        called as progress_callback(done, total, step) each time a fit finishes.
+        
+        By default models are scored on one random test_size holdout. With cv ('time_series',
+        'kfold' or a ModelEvaluator) they are scored by cross-validation instead and then refit
+        on all rows; time-series folds split on dates, the order dates aligned with X.
+        """
         # Initialize models first
         self.initialize_models()
+        self.feature_names = list(X.columns) if hasattr(X, 'columns') else None
         
-        # Split the data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
-        """Train all models and evaluate performance"""
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        if cv is not None:
+            return self._train_models_cv(X, y, cv, dates, n_jobs, backend, progress_callback)
         
-        self.model_performance = {}
+        # Convert, split and scale once; every model gets the same arrays
+        data = TrainingData(X, y, test_size=test_size, random_state=42)
+        data.fit_scaler(self.scaler)
         
-        for name, model in self.models.items():
-            print(f"Training {name}...")
-            
-            # Train model
-            if name in ['XGBoost'] or (name == 'LightGBM' and LIGHTGBM_AVAILABLE):
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-            else:
-                model.fit(X_train_scaled, y_train)
-                y_pred = model.predict(X_test_scaled)
-            
-            # Calculate metrics
-            mse = mean_squared_error(y_test, y_pred)
-            rmse = np.sqrt(mse)
-            mae = mean_absolute_error(y_test, y_pred)
-            r2 = r2_score(y_test, y_pred)
-            
-            self.model_performance[name] = {
-                'MSE': mse,
-                'RMSE': rmse,
-                'MAE': mae,
-                'R2_Score': r2,
-                'Model': model
-            }
-            
-            print(f"{name} - RMSE: {rmse:.2f}, R2: {r2:.4f}")
+        workers = self.allocate_cores(n_jobs)
+        finished = Parallel(n_jobs=workers, backend=backend, return_as='generator_unordered')(
+            delayed(self._fit_and_score)(name, model, data) for name, model in self.models.items()
+        )
+        results = {}
+        for name, metrics in finished:
+            results[name] = metrics
+            if progress_callback is not None:
+                progress_callback(len(results), len(self.models), name)
+        
+        # Process backends return fitted copies; keep those and the original model order
+        self.model_performance = {name: results[name] for name in self.models}
+        return self._select_best_model()
+    
+    def _fit_full(self, name, model, data):
+        print(f"Training {name} on all rows...")
+        model.fit(data.X_train if self.uses_unscaled_features(name) else data.X_train_scaled, data.y_train)
+        return name, model
+    
+    def _train_models_cv(self, X, y, cv, dates, n_jobs, backend, progress_callback):
+        """Score every model by cross-validation, then refit each on all rows"""
+        if not isinstance(cv, ModelEvaluator):
+            # Keep the previous evaluator when the scheme is unchanged so its fold predictions are reused
+            reuse = self.evaluator is not None and self.evaluator.strategy == cv and self.evaluator.backend == backend
+            cv = self.evaluator if reuse else ModelEvaluator(strategy=cv, backend=backend)
+        self.evaluator = cv
+        
+        workers = self.allocate_cores(n_jobs)
+        n_models = len(self.models)
+        fold_fits = [0]
+        
+        def report_fold(done, total, step):
+            fold_fits[0] = total
+            progress_callback(done, total + n_models, step)
+        
+        data = TrainingData(X, y, test_size=None)
+        X = pd.DataFrame(data.X, columns=data.feature_names, copy=False)
+        scaled_models = [name for name in self.models if not self.uses_unscaled_features(name)]
+        cv.evaluate(self.models, X, data.y, dates=dates, scaled_models=scaled_models, n_jobs=workers,
+                    progress_callback=report_fold if progress_callback is not None else None)
+        summary = cv.summary()
+        for name, metrics in summary.iterrows():
+            print(f"{name} - CV RMSE: {metrics['RMSE']:.2f}, CV R2: {metrics['R2_Score']:.4f} (+/- {metrics['R2_Std']:.4f})")
+        
+        data.fit_scaler(self.scaler)
+        finished = Parallel(n_jobs=workers, backend=backend, return_as='generator_unordered')(
+            delayed(self._fit_full)(name, model, data) for name, model in self.models.items()
+        )
+        fitted = {}
+        for name, model in finished:
+            fitted[name] = model
+            if progress_callback is not None:
+                progress_callback(fold_fits[0] + len(fitted), fold_fits[0] + n_models, f"{name} (all rows)")
+        
+        self.model_performance = {name: dict(summary.loc[name].to_dict(), Model=fitted[name]) for name in self.models}
+        return self._select_best_model()
+    
+    def _select_best_model(self):
+        self.models = {name: metrics['Model'] for name, metrics in self.model_performance.items()}
         
         # Find best model
         best_r2 = max(self.model_performance.values(), key=lambda x: x['R2_Score'])
@@ -100,7 +342,9 @@ class ModelManager:
         if self.best_model is None:
             raise ValueError("No trained model available. Please train models first.")
         
-        if self.best_model_name in ['XGBoost'] or (self.best_model_name == 'LightGBM' and LIGHTGBM_AVAILABLE):
+        # Same dtype and scaling arithmetic as in training, so values land on the same side of tree splits
+        X_new = as_feature_matrix(X_new)
+        if self.uses_unscaled_features(self.best_model_name):
             predictions = self.best_model.predict(X_new)
         else:
             X_new_scaled = self.scaler.transform(X_new)
@@ -127,75 +371,201 @@ class ModelManager:
         else:
             return None
     
-    def save_model(self, filepath):
-        """Save the best model"""
+    def save_model(self, filepath, encoders=None, compress=0, model_name=None):
+        """Save the best model (or the trained model_name) as an artifact directory.
+        
+        manifest.json holds everything but the model itself: features, encoders, scaler
+        parameters and metrics, so it can be read without deserializing anything. XGBoost and
+        LightGBM are stored in their native booster formats; other models are joblib files,
+        compressed at level compress (0-9). Uncompressed files can be memory-mapped on load.
+        """
         if self.best_model is None:
             raise ValueError("No trained model to save.")
         
-        model_data = {
-            'model': self.best_model,
-            'scaler': self.scaler,
-            'model_name': self.best_model_name,
-            'performance': self.model_performance[self.best_model_name]
-        }
+        model_name = model_name or self.best_model_name
+        model = self.best_model if model_name == self.best_model_name else self.model_performance[model_name]['Model']
+        if isinstance(model, LazyModel):
+            model = model.model
+        encoders = encoders if encoders is not None else self.encoders
+        os.makedirs(filepath, exist_ok=True)
+        
+        if model_name == 'XGBoost':
+            model_file, model_format = 'model.ubj', 'xgboost'
+            model.save_model(os.path.join(filepath, model_file))
+        elif model_name == 'LightGBM' and LIGHTGBM_AVAILABLE:
+            model_file, model_format = 'model.txt', 'lightgbm'
+            booster = model.booster if isinstance(model, LightGBMBoosterModel) else model.booster_
+            booster.save_model(os.path.join(filepath, model_file))
+        else:
+            model_file, model_format = 'model.joblib', 'joblib'
+            joblib.dump(model, os.path.join(filepath, model_file), compress=compress)
         
-        joblib.dump(model_data, filepath)
+        scaler = None
+        if hasattr(self.scaler, 'mean_'):
+            scaler = {
+                'mean': self.scaler.mean_.tolist(),
+                'scale': self.scaler.scale_.tolist(),
+                'var': self.scaler.var_.tolist(),
+                'n_samples_seen': int(self.scaler.n_samples_seen_),
+                'feature_names': list(getattr(self.scaler, 'feature_names_in_', [])) or None
+            }
+        
+        manifest = {
+            'format_version': ARTIFACT_VERSION,
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'model_name': model_name,
+            'model_file': model_file,
+            'model_format': model_format,
+            'compress': compress,
+            'features': self.feature_names,
+            'encoders': encoders.to_dict() if encoders is not None else None,
+            'scaler': scaler,
+            # Metrics of every trained model so comparisons survive a reload
+            'comparison': {name: {k: float(v) for k, v in metrics.items() if k != 'Model'}
+                           for name, metrics in self.model_performance.items()}
+        }
+        with open(os.path.join(filepath, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
         print(f"Model saved to {filepath}")
     
-    def load_model(self, filepath):
-        """Load a saved model"""
+    def read_manifest(self, filepath):
+        """Metadata of a saved artifact, without loading the model"""
+        with open(os.path.join(filepath, MANIFEST_NAME)) as f:
+            return json.load(f)
+    
+    def load_model(self, filepath, mmap_mode=None):
+        """Load a saved model; mmap_mode='r' maps uncompressed model arrays instead of reading them"""
+        if not os.path.isdir(filepath):
+            return self._load_legacy_model(filepath)
+        
+        manifest = self.read_manifest(filepath)
+        model = load_artifact_model(filepath, manifest, mmap_mode)
+        self.scaler = scaler_from_manifest(manifest)
+        
+        self.best_model = model
+        self.best_model_name = manifest['model_name']
+        self.model_performance = {name: dict(metrics, Model=None) for name, metrics in manifest['comparison'].items()}
+        self.model_performance[self.best_model_name]['Model'] = model
+        # Only the saved model is fitted; the other families keep their metrics but no model
+        self.models = {self.best_model_name: model}
+        self.encoders = EncoderRegistry.from_dict(manifest['encoders']) if manifest.get('encoders') else None
+        self.feature_names = manifest.get('features')
+        
+        print(f"Model {self.best_model_name} loaded successfully")
+        return {k: v for k, v in self.model_performance[self.best_model_name].items() if k != 'Model'}
+    
+    def _load_legacy_model(self, filepath):
+        """Load a single-file .joblib/.pkl model saved before artifact directories"""
         model_data = joblib.load(filepath)
         self.best_model = model_data['model']
         self.scaler = model_data['scaler']
         self.best_model_name = model_data['model_name']
+        comparison = model_data.get('comparison') or {self.best_model_name: model_data['performance']}
+        self.model_performance = {name: dict(metrics, Model=None) for name, metrics in comparison.items()}
+        self.model_performance[self.best_model_name]['Model'] = self.best_model
+        self.models = {self.best_model_name: self.best_model}
+        # Older artifacts predate the encoder registry
+        if model_data.get('encoders') is not None:
+            self.encoders = EncoderRegistry.from_dict(model_data['encoders'])
+        self.feature_names = model_data.get('features')
         
         print(f"Model {self.best_model_name} loaded successfully")
         return model_data['performance']
     
-    def predict_future_sales(self, data_processor, months_ahead=6):
-        """Predict future sales based on historical trends"""
-        df = data_processor.processed_df
+    def forecast_baseline(self, data_processor):
+        """Average feature vector of the historical data, the starting point of every forecast row"""
+        X, _ = data_processor.get_features_for_modeling()
+        return X.mean()
+    
+    def future_month_ends(self, data_processor, months_ahead):
+        """Month ends following the latest order, as many as requested"""
+        latest_date = data_processor.processed_df['ORDERDATE'].max()
+        return pd.date_range(start=latest_date + pd.DateOffset(months=1),
+                             periods=months_ahead, freq=pd.offsets.MonthEnd())
+    
+    def horizon_features(self, baselines, future_dates):
+        """Feature matrix with one row per (series, month): each baseline row repeated over the
+        horizon with that month's calendar features"""
+        n_series, n_months = len(baselines), len(future_dates)
+        features = pd.DataFrame(
+            np.repeat(baselines.to_numpy(dtype=np.float64), n_months, axis=0),
+            columns=baselines.columns
+        )
+        calendar = {
+            'YEAR': future_dates.year, 'MONTH': future_dates.month, 'DAY': future_dates.day,
+            'DAYOFWEEK': future_dates.dayofweek, 'QUARTER': future_dates.quarter,
+            'QTR_ID': future_dates.quarter, 'MONTH_ID': future_dates.month, 'YEAR_ID': future_dates.year
+        }
+        for col, values in calendar.items():
+            if col in features.columns:
+                features[col] = np.tile(np.asarray(values, dtype=np.float64), n_series)
+        return features
+    
+    def _horizon_frame(self, future_dates, n_series, predictions):
+        return pd.DataFrame({
+            'Date': np.tile(future_dates, n_series),
+            'Predicted_Sales': predictions,
+            'Year': np.tile(future_dates.year, n_series),
+            'Month': np.tile(future_dates.month, n_series),
+            'Quarter': np.tile(future_dates.quarter, n_series)
+        })
+    
+    def predict_future_sales(self, data_processor, months_ahead=6, scenarios=None, baseline=None):
+        """Predict future sales based on historical trends.
         
-        # Get the latest date and create future dates
-        latest_date = df['ORDERDATE'].max()
-        future_dates = pd.date_range(start=latest_date + pd.DateOffset(months=1), 
-                                   periods=months_ahead, freq='M')
+        Builds the whole horizon as one feature matrix, the baseline with each month's calendar
+        features, and predicts it in a single call. scenarios maps a scenario name to feature
+        overrides, e.g. {'Large deals': {'DEALSIZE_NUMERIC': 3}}; every scenario covers the full
+        horizon and the result gets a Scenario column. Pass a precomputed baseline to skip
+        averaging the data again.
+        """
+        if baseline is None:
+            baseline = self.forecast_baseline(data_processor)
+        future_dates = self.future_month_ends(data_processor, months_ahead)
         
-        # Create future data based on historical patterns
-        future_predictions = []
+        named = scenarios or {'Baseline': {}}
+        baselines = pd.DataFrame([baseline] * len(named), index=list(named))
+        for name, overrides in named.items():
+            for col, value in overrides.items():
+                baselines.loc[name, col] = value
         
-        for date in future_dates:
-            # Use average values from historical data for prediction
-            avg_features = df.select_dtypes(include=[np.number]).mean()
-            
-            # Update date-related features
-            avg_features['YEAR'] = date.year
-            avg_features['MONTH'] = date.month
-            avg_features['DAY'] = date.day
-            avg_features['DAYOFWEEK'] = date.dayofweek
-            avg_features['QUARTER'] = date.quarter
-            avg_features['QTR_ID'] = date.quarter
-            avg_features['MONTH_ID'] = date.month
-            avg_features['YEAR_ID'] = date.year
-            
-            # Get features for modeling
-            X, _ = data_processor.get_features_for_modeling()
-            feature_cols = X.columns
-            
-            future_row = avg_features[feature_cols].values.reshape(1, -1)
-            
-            # Make prediction
-            predicted_sales = self.predict_sales(future_row)[0]
-            
-            future_predictions.append({
-                'Date': date,
-                'Predicted_Sales': predicted_sales,
-                'Year': date.year,
-                'Month': date.month,
-                'Quarter': date.quarter
-            })
+        features = self.horizon_features(baselines, future_dates)
+        predictions = self._horizon_frame(future_dates, len(named), self.predict_sales(features))
+        if scenarios is not None:
+            predictions.insert(0, 'Scenario', np.repeat(list(named), len(future_dates)))
+        return predictions
+    
+    def predict_segment_sales(self, data_processor, segment_col, months_ahead=6, segments=None,
+                              batch_rows=PREDICT_BATCH_ROWS, n_jobs=1):
+        """Forecast every segment of segment_col (e.g. PRODUCTLINE, COUNTRY, CUSTOMERNAME) at once.
+        
+        Each segment's baseline is its own average feature vector, computed for all segments in
+        one groupby. The segments x months matrix is predicted in batches of batch_rows, spread
+        over n_jobs worker processes when n_jobs is not 1. segments restricts the output to a
+        subset of segment values. Rows missing segment_col form their own segment, labelled NaN
+        (TERRITORY is missing for North America in the sample data).
+        """
+        X, _ = data_processor.get_features_for_modeling()
+        keys = data_processor.df[segment_col]
+        baselines = X.groupby(keys.to_numpy(), sort=True, dropna=False).mean()
+        if segments is not None:
+            baselines = baselines.loc[[segment for segment in segments if segment in baselines.index]]
+        future_dates = self.future_month_ends(data_processor, months_ahead)
         
-        return pd.DataFrame(future_predictions)
+        features = self.horizon_features(baselines, future_dates)
+        batches = [features.iloc[start:start + batch_rows] for start in range(0, len(features), batch_rows)]
+        if n_jobs == 1 or len(batches) < 2:
+            predictions = [self.predict_sales(batch) for batch in batches]
+        else:
+            predictions = Parallel(n_jobs=n_jobs, backend='loky')(
+                delayed(self.predict_sales)(batch) for batch in batches
+            )
+        
+        forecast = self._horizon_frame(
+            future_dates, len(baselines), np.concatenate(predictions) if predictions else np.empty(0)
+        )
+        forecast.insert(0, segment_col, np.repeat(baselines.index.to_numpy(), len(future_dates)))
+        return forecast
     
     def get_model_comparison(self):
         """Get comparison of all trained models"""
@@ -229,19 +599,37 @@ class ModelManager:
         
         return clv_predictions
     
-    def hyperparameter_tuning(self, X, y, model_choice):
-        # Placeholder: Only Random Forest implemented for simplicity
-        if model_choice == "Random Forest":
-            from sklearn.model_selection import GridSearchCV
-            param_grid = {
-                'n_estimators': [50, 100, 200],
-                'max_depth': [None, 10, 20]
-            }
-            rf = RandomForestRegressor(random_state=42)
-            grid = GridSearchCV(rf, param_grid, cv=3, scoring='r2')
-            grid.fit(X, y)
-            self.best_model = grid.best_estimator_
-            self.models['Random Forest'] = self.best_model
-            return self.best_model
-        # Add XGBoost/LightGBM if needed
-        return None
\ No newline at end of file
+    def hyperparameter_tuning(self, X, y, model_choice, time_budget=None, n_candidates=27, n_jobs=-1,
+                              progress_callback=None):
+        """Tune one model family and make the tuned model the active one.
+        
+        Returns the fitted estimator, or None if the family cannot be tuned here. Random Forest
+        and Gradient Boosting are tuned on standardized features, like in train_models. The
+        family's model_performance entry is replaced by its CV R2, marked Tuned. time_budget
+        bounds the search; the final refit on all rows runs after it.
+        """
+        model_name = TUNING_ALIASES.get(model_choice, model_choice)
+        try:
+            tuner = HyperparameterTuner(model_name, n_candidates=n_candidates, time_budget=time_budget, n_jobs=n_jobs)
+        except ValueError as e:
+            print(e)
+            return None
+        
+        X_fit = as_feature_matrix(X)
+        if not self.uses_unscaled_features(model_name):
+            if not hasattr(self.scaler, 'mean_'):
+                self.scaler.fit(X_fit)
+            X_fit = self.scaler.transform(X_fit)
+        
+        result = tuner.tune(X_fit, y, progress_callback=progress_callback)
+        self.tuning_results[model_name] = result
+        print(f"Tuned {model_name}: CV R2 {result['best_score']:.4f} in {result['elapsed']:.1f}s with {result['best_params']}")
+        
+        self.best_model = result['estimator']
+        self.best_model_name = model_name
+        self.models[model_name] = self.best_model
+        # A new entry, not an update: copies made with copy() share the old one. The tuned
+        # family is scored by CV R2 only; its hold-out RMSE and MAE belonged to the untuned model.
+        self.model_performance[model_name] = {'R2_Score': result['best_score'], 'Tuned': True,
+                                              'Model': self.best_model}
+        return self.best_model
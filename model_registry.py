@@ -0,0 +1,172 @@
+"""
+Model Registry
+Versioned storage of every trained model, listed from a JSON index and loaded on demand
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import pandas as pd
+from encoders import EncoderRegistry
+from model_manager import ModelManager, LazyModel, MANIFEST_NAME, scaler_from_manifest
+
+MODEL_REGISTRY_DIR = '.model_registry'
+INDEX_NAME = 'index.json'
+
+
+class ModelRegistry:
+    """Keeps each training run as a numbered version holding one artifact directory per model.
+
+    index.json records every version's data fingerprint, feature schema and metrics, so
+    versions can be listed and compared without reading any model. load() returns a
+    ModelManager whose models are only deserialized when they first predict.
+    """
+    def __init__(self, root=MODEL_REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_NAME)
+
+    def read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'versions': [], 'production': None}
+
+    def _write_index(self, index):
+        # Write then rename so readers never see a partial index
+        fd, staging = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f, indent=2, default=str)
+        os.replace(staging, self._index_path())
+
+    def _version_dir(self, version):
+        return os.path.join(self.root, f"v{version:04d}")
+
+    def register(self, model_manager, data_fingerprint, compress=0, notes=None):
+        """Save every trained model of model_manager as a new version and return its number"""
+        trained = {name: metrics for name, metrics in model_manager.model_performance.items()
+                   if metrics.get('Model') is not None}
+        if not trained:
+            raise ValueError("No trained models to register.")
+
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            index = self.read_index()
+            version = max([entry['version'] for entry in index['versions']], default=0) + 1
+            staging = tempfile.mkdtemp(dir=self.root, suffix='.tmp')
+            try:
+                for name in trained:
+                    model_manager.save_model(os.path.join(staging, name), compress=compress, model_name=name)
+                os.replace(staging, self._version_dir(version))
+            except Exception:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+            index['versions'].append({
+                'version': version,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'data_fingerprint': data_fingerprint,
+                'features': model_manager.feature_names,
+                'best_model': model_manager.best_model_name,
+                'models': sorted(trained),
+                'metrics': {name: {k: float(v) for k, v in metrics.items() if k != 'Model'}
+                            for name, metrics in model_manager.model_performance.items()},
+                'notes': notes
+            })
+            if index['production'] is None:
+                index['production'] = version
+            self._write_index(index)
+        print(f"Registered models as version {version}")
+        return version
+
+    def get_version(self, version=None):
+        """Index entry of version, or of the production version when None"""
+        index = self.read_index()
+        version = version if version is not None else index['production']
+        for entry in index['versions']:
+            if entry['version'] == version:
+                return entry
+        raise KeyError(f"No model version {version}")
+
+    def list_versions(self):
+        """One row per version with its best model and score, read from the index only"""
+        index = self.read_index()
+        rows = []
+        for entry in index['versions']:
+            best = entry['metrics'].get(entry['best_model'], {})
+            rows.append({
+                'Version': entry['version'],
+                'Created': entry['created_at'],
+                'Data': (entry['data_fingerprint'] or '')[:10],
+                'Best_Model': entry['best_model'],
+                'R2_Score': best.get('R2_Score'),
+                'RMSE': best.get('RMSE'),
+                'Models': len(entry['models']),
+                'Production': entry['version'] == index['production']
+            })
+        return pd.DataFrame(rows)
+
+    def compare(self, versions=None):
+        """Metrics of every model in the given versions (all by default), one row per version and model"""
+        rows = []
+        for entry in self.read_index()['versions']:
+            if versions is not None and entry['version'] not in versions:
+                continue
+            for name, metrics in entry['metrics'].items():
+                rows.append(dict(metrics, Version=entry['version'], Model=name))
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).set_index(['Version', 'Model']).round(4)
+
+    def load(self, version=None, model_name=None, mmap_mode=None):
+        """ModelManager for a version (production by default) with model_name, or the version's
+        best model, active. Models are deserialized lazily, on their first prediction."""
+        entry = self.get_version(version)
+        model_name = model_name or entry['best_model']
+        if model_name not in entry['models']:
+            raise KeyError(f"Version {entry['version']} has no {model_name} model")
+
+        version_dir = self._version_dir(entry['version'])
+        manifests = {}
+        for name in entry['models']:
+            with open(os.path.join(version_dir, name, MANIFEST_NAME)) as f:
+                manifests[name] = json.load(f)
+
+        model_manager = ModelManager()
+        model_manager.models = {name: LazyModel(os.path.join(version_dir, name), manifest, mmap_mode)
+                                for name, manifest in manifests.items()}
+        model_manager.model_performance = {name: dict(metrics, Model=model_manager.models.get(name))
+                                           for name, metrics in entry['metrics'].items()}
+        model_manager.best_model_name = model_name
+        model_manager.best_model = model_manager.models[model_name]
+        manifest = manifests[model_name]
+        model_manager.scaler = scaler_from_manifest(manifest)
+        model_manager.encoders = EncoderRegistry.from_dict(manifest['encoders']) if manifest.get('encoders') else None
+        model_manager.feature_names = manifest.get('features')
+        return model_manager
+
+    def promote(self, version):
+        """Mark version as the production one"""
+        with self._lock:
+            index = self.read_index()
+            if version not in [entry['version'] for entry in index['versions']]:
+                raise KeyError(f"No model version {version}")
+            index['production'] = version
+            self._write_index(index)
+        print(f"Version {version} is now in production")
+
+    def rollback(self):
+        """Promote the version registered before the current production one; returns it"""
+        index = self.read_index()
+        earlier = [entry['version'] for entry in index['versions']
+                   if index['production'] is not None and entry['version'] < index['production']]
+        if not earlier:
+            raise ValueError("No earlier version to roll back to")
+        self.promote(earlier[-1])
+        return earlier[-1]
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Prediction Client - load test for prediction_server.py
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from data_processor import DataProcessor
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Send concurrent prediction requests and report latency")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--data", default="sales_data.csv", help="CSV whose rows are sent as requests")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    return parser.parse_args()
+
+def load_rows(path, limit=10000):
+    """Raw order rows as JSON-ready dicts"""
+    chunk = next(DataProcessor(path, use_cache=False).iter_chunks(limit))
+    chunk['ORDERDATE'] = chunk['ORDERDATE'].dt.strftime('%Y-%m-%d')
+    return json.loads(chunk.to_json(orient='records'))
+
+def post(url, rows):
+    request = urllib.request.Request(url + '/predict', data=json.dumps({'rows': rows}).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        predictions = json.loads(response.read())['predictions']
+    return time.perf_counter() - start, len(predictions)
+
+def run_load_test(url, rows, n_requests=1000, concurrency=16, rows_per_request=1):
+    payloads = [[rows[(i * rows_per_request + j) % len(rows)] for j in range(rows_per_request)]
+                for i in range(n_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda payload: post(url, payload), payloads))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    return {
+        'requests': n_requests,
+        'rows': sum(n for _, n in results),
+        'elapsed_s': elapsed,
+        'requests_per_s': n_requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99))
+    }
+
+def main():
+    args = parse_args()
+    rows = load_rows(args.data)
+    print(f"🚀 Sending {args.requests} requests to {args.url} ({args.concurrency} concurrent)...")
+    report = run_load_test(args.url, rows, args.requests, args.concurrency, args.rows_per_request)
+    print(f"Client: {report['requests_per_s']:,.0f} requests/s, "
+          f"p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms")
+
+    with urllib.request.urlopen(args.url + '/stats') as response:
+        stats = json.loads(response.read())
+    print(f"Server: {stats['batches']} batches, {stats['avg_batch_rows']:.1f} rows per batch, "
+          f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
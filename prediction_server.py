@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Prediction Server - HTTP/JSON scoring for a saved model, with micro-batching
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from data_processor import parse_order_dates, FEATURE_SOURCES, TEXT_SOURCES
+import batch_score
+
+# Fields every order row needs for feature derivation, whatever the model's features
+REQUIRED_FIELDS = ['SALES', 'QUANTITYORDERED', 'PRICEEACH']
+# Latencies kept for the percentiles reported by /stats
+LATENCY_WINDOW = 10000
+
+
+class MicroBatcher:
+    """Collects rows from concurrent requests and scores them together.
+
+    A batch is closed once it holds max_batch_rows rows or its first request has waited
+    max_wait_ms, then scored with one vectorized predict call on a single scoring thread.
+    """
+    def __init__(self, max_batch_rows=512, max_wait_ms=5):
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.thread.start()
+
+    def submit(self, rows):
+        """Queue a list of row dicts; the returned future resolves to their predictions"""
+        future = Future()
+        with self.condition:
+            self.queue.append((rows, future, time.perf_counter()))
+            self.condition.notify()
+        return future
+
+    def _next_batch(self):
+        with self.condition:
+            while not self.queue:
+                self.condition.wait()
+            deadline = self.queue[0][2] + self.max_wait
+            while sum(len(rows) for rows, _, _ in self.queue) < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            batch, size = [], 0
+            while self.queue and (not batch or size + len(self.queue[0][0]) <= self.max_batch_rows):
+                item = self.queue.popleft()
+                batch.append(item)
+                size += len(item[0])
+            return batch
+
+    @staticmethod
+    def _score(rows):
+        chunk = pd.DataFrame(rows)
+        if 'ORDERDATE' in chunk.columns:
+            chunk['ORDERDATE'] = parse_order_dates(chunk['ORDERDATE'])
+        scored, dropped = batch_score.score_chunk(chunk, [])
+        if dropped:
+            raise ValueError(f"{dropped} rows have missing SALES, QUANTITYORDERED or PRICEEACH")
+        return scored[batch_score.PREDICTION_COLUMN].to_numpy()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                predictions = self._score([row for rows, _, _ in batch for row in rows])
+                results, start = [], 0
+                for rows, _, _ in batch:
+                    results.append(predictions[start:start + len(rows)].tolist())
+                    start += len(rows)
+            except Exception:
+                # One bad request must not fail the others batched with it: score each on its own
+                results = []
+                for rows, _, _ in batch:
+                    try:
+                        results.append(self._score(rows).tolist())
+                    except Exception as e:
+                        results.append(e)
+
+            finished = time.perf_counter()
+            for (rows, future, submitted), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                    continue
+                future.set_result(result)
+                self.latencies.append(finished - submitted)
+                self.requests += 1
+                self.rows += len(rows)
+            self.batches += 1
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'rows': self.rows,
+            'avg_batch_rows': self.rows / self.batches if self.batches else 0,
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None
+        }
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """POST /predict with {"rows": [...]} or a single row object; GET /health and /stats"""
+    batcher = None
+    model_name = None
+    required_fields = REQUIRED_FIELDS
+    numeric_fields = REQUIRED_FIELDS
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'model': self.model_name})
+        elif self.path == '/stats':
+            self._send_json(200, self.batcher.stats())
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def validate_row(self, row):
+        """Why row cannot be scored, or None when it has every field the model needs"""
+        # Text fields may be null (the sample data's "NA" territory loads as one); numbers may not
+        missing = [field for field in self.required_fields
+                   if field not in row or (row[field] is None and field in self.numeric_fields)]
+        if missing:
+            return f"is missing {', '.join(missing)}"
+        not_numeric = [field for field in self.numeric_fields
+                       if isinstance(row[field], bool) or not isinstance(row[field], (int, float))]
+        if not_numeric:
+            return f"has non-numeric {', '.join(not_numeric)}"
+        if 'ORDERDATE' in self.required_fields and pd.isna(pd.to_datetime(row['ORDERDATE'] or '', errors='coerce')):
+            return f"has an unparseable ORDERDATE {row['ORDERDATE']!r}"
+        return None
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        except ValueError as e:
+            self._send_json(400, {'error': f"Invalid JSON: {e}"})
+            return
+
+        rows = payload.get('rows', [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            self._send_json(400, {'error': "Expected an order row or {\"rows\": [...]}"})
+            return
+        for i, row in enumerate(rows):
+            error = self.validate_row(row)
+            if error:
+                self._send_json(400, {'error': f"Row {i} {error}"})
+                return
+
+        try:
+            predictions = self.batcher.submit(rows).result()
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {'predictions': predictions})
+
+    def log_message(self, format, *args):
+        # One log line per request would dominate the cost of small predictions
+        pass
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 resets connections under concurrent load
+    request_queue_size = 128
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve predictions from a model saved by ModelManager.save_model")
+    parser.add_argument("model", help="Saved model artifact directory (or a legacy .joblib file)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-rows", type=int, default=512,
+                        help="Largest number of rows scored in one predict call")
+    parser.add_argument("--max-wait-ms", type=float, default=5,
+                        help="How long a request may wait for others to join its batch")
+    return parser.parse_args()
+
+def required_fields(feature_names):
+    """Raw fields a row needs to build feature_names, and which of them must be numbers"""
+    fields = list(REQUIRED_FIELDS)
+    for feature in feature_names or []:
+        for source in FEATURE_SOURCES.get(feature, [feature]):
+            if source not in fields:
+                fields.append(source)
+    return fields, [field for field in fields if field not in TEXT_SOURCES]
+
+def create_server(model_path, host='127.0.0.1', port=8000, max_batch_rows=512, max_wait_ms=5):
+    """Load the model once and return a server ready for serve_forever()"""
+    batch_score.init_worker(model_path, threads_per_model=-1)
+    model_manager = batch_score._scorer['model_manager']
+    PredictionHandler.batcher = MicroBatcher(max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms)
+    PredictionHandler.model_name = model_manager.best_model_name
+    PredictionHandler.required_fields, PredictionHandler.numeric_fields = required_fields(model_manager.feature_names)
+    return PredictionServer((host, port), PredictionHandler)
+
+def main():
+    args = parse_args()
+    server = create_server(args.model, args.host, args.port, args.max_batch_rows, args.max_wait_ms)
+    print(f"🚀 Serving {PredictionHandler.model_name} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,28 @@
 Simple Analytics Runner - No Streamlit Required
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from data_processor import DataProcessor
 from model_manager import ModelManager
 from analytics_engine import AnalyticsEngine
+from evaluation import CV_STRATEGIES
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run sales analytics without the dashboard")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows to bound memory")
+    parser.add_argument("--compress", type=int, default=0,
+                        help="joblib compression level (0-9) for saved models; 0 allows memory-mapping")
+    parser.add_argument("--cv", choices=CV_STRATEGIES, default=None,
+                        help="Score models by cross-validation instead of one random holdout split")
+    parser.add_argument("--save-model", default=None,
+                        help="Directory to save the best model artifact in, for batch_score.py")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     print("🚀 Starting Sales Analytics...")
     
     # Initialize components
@@ -19,29 +34,47 @@ def main():
     
     # Load and process data
     print("📊 Loading data...")
-    if data_processor.load_data():
+    if data_processor.load_data(chunksize=args.chunksize):
         print("✅ Data loaded successfully")
         
-        # Process data
-        print("🔄 Processing data...")
-        processed_df = data_processor.preprocess_data()
-        print(f"✅ Data processed: {len(processed_df)} rows, {len(processed_df.columns)} columns")
+        if args.chunksize:
+            # Chunked mode keeps running aggregates instead of the processed frame
+            stats = data_processor.aggregates.summary()
+        else:
+            # Process data
+            print("🔄 Processing data...")
+            processed_df = data_processor.preprocess_data()
+            print(f"✅ Data processed: {len(processed_df)} rows, {len(processed_df.columns)} columns")
+            stats = {
+                'total_sales': processed_df['SALES'].sum(),
+                'total_orders': len(processed_df),
+                'avg_order_value': processed_df['SALES'].mean(),
+                'unique_customers': processed_df['CUSTOMERNAME'].nunique(),
+                'total_profit': processed_df['TOTAL_PROFIT'].sum() if 'TOTAL_PROFIT' in processed_df.columns else None
+            }
         
         # Display basic statistics
         print("\n📈 Basic Statistics:")
-        print(f"Total Sales: ${processed_df['SALES'].sum():,.2f}")
-        print(f"Total Orders: {len(processed_df):,}")
-        print(f"Average Order Value: ${processed_df['SALES'].mean():,.2f}")
-        print(f"Unique Customers: {processed_df['CUSTOMERNAME'].nunique():,}")
-        if 'TOTAL_PROFIT' in processed_df.columns:
-            print(f"Total Profit: ${processed_df['TOTAL_PROFIT'].sum():,.2f}")
+        print(f"Total Sales: ${stats['total_sales']:,.2f}")
+        print(f"Total Orders: {stats['total_orders']:,}")
+        print(f"Average Order Value: ${stats['avg_order_value']:,.2f}")
+        print(f"Unique Customers: {stats['unique_customers']:,}")
+        if stats['total_profit'] is not None:
+            print(f"Total Profit: ${stats['total_profit']:,.2f}")
         
         # Train models
         print("\n🤖 Training ML models...")
         X, y = data_processor.prepare_model_data(target='TOTAL_PROFIT')
         if X is not None and y is not None:
-            results = model_manager.train_models(X, y, test_size=0.2)
+            dates = data_processor.get_model_dates()
+            if args.cv == 'time_series' and dates is None:
+                print("⚠️ Time-series validation needs the full data; using k-fold instead")
+                args.cv = 'kfold'
+            results = model_manager.train_models(X, y, test_size=0.2, cv=args.cv, dates=dates)
+            model_manager.encoders = data_processor.encoders
             print("✅ Models trained successfully")
+            if args.save_model:
+                model_manager.save_model(args.save_model, compress=args.compress)
             
             # Display model results
             print("\n🎯 Model Performance:")
@@ -0,0 +1,58 @@
+"""
+Distinct Count Sketches
+HyperLogLog registers built from 64-bit value hashes, mergeable by taking the register maximum
+"""
+
+import numpy as np
+import pandas as pd
+
+# 2**11 registers: about 2.3% standard error at 2 KB per sketch
+SKETCH_PRECISION = 11
+
+
+def hash_values(values):
+    """64-bit hashes of values, hashing each distinct value once; missing values get no hash.
+    Returns (hashes, present) where present marks the rows that were hashed."""
+    codes, uniques = pd.factorize(pd.Series(values))
+    unique_hashes = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    present = codes >= 0
+    return unique_hashes[codes[present]], present
+
+
+def _bit_length(x):
+    """Bit length of each uint64, exact (float64 holds each 32-bit half exactly)"""
+    high = (x >> np.uint64(32)).astype(np.float64)
+    low = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def register_updates(hashes, precision=SKETCH_PRECISION):
+    """Register index and rank (position of the first set bit after the index bits) of each hash"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes << np.uint64(precision)
+    rank = np.minimum(64 - _bit_length(rest) + 1, 64 - precision + 1)
+    return index, rank.astype(np.uint8)
+
+
+def hll_registers(hashes, groups=None, n_groups=1, precision=SKETCH_PRECISION):
+    """One row of registers per group (all hashes in group 0 when groups is None)"""
+    m = 1 << precision
+    registers = np.zeros((n_groups, m), dtype=np.uint8)
+    index, rank = register_updates(hashes, precision)
+    if groups is not None:
+        index = np.asarray(groups, dtype=np.int64) * m + index
+    np.maximum.at(registers.ravel(), index, rank)
+    return registers
+
+
+def hll_estimate(registers):
+    """Distinct count estimate of each row of registers, with linear counting for small counts"""
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Distinct customer counts from the sketch cube: exact on small data, constant cost as rows grow
+"""
+
+import numpy as np
+import pandas as pd
+from analytics_engine import DistinctCountCube
+
+PRODUCT_LINES = ['Classic Cars', 'Vintage Cars', 'Motorcycles', 'Trucks and Buses', 'Planes', 'Ships', 'Trains']
+
+
+def sales_frame(n_rows, seed=0):
+    """Orders over about two and a half years with one customer per ten orders"""
+    rng = np.random.default_rng(seed)
+    country = rng.integers(0, 19, n_rows)
+    return pd.DataFrame({
+        'ORDERDATE': pd.Timestamp('2003-01-01') + pd.to_timedelta(rng.integers(0, 880, n_rows), unit='D'),
+        'PRODUCTLINE': rng.choice(PRODUCT_LINES, n_rows),
+        'TERRITORY': np.array(['EMEA', None, 'APAC', 'Japan'], dtype=object)[country % 4],
+        'DEALSIZE': rng.choice(['Small', 'Medium', 'Large'], n_rows),
+        'CUSTOMER_SEGMENT': rng.choice(['Small', 'Medium', 'Large'], n_rows),
+        'STATUS': rng.choice(['Shipped', 'Cancelled', 'On Hold', 'Resolved'], n_rows),
+        'COUNTRY': country.astype(str),
+        'CUSTOMERNAME': rng.integers(0, max(n_rows // 10, 1), n_rows).astype(str)
+    })
+
+
+def test_distinct_counts_are_exact_on_small_data():
+    df = sales_frame(3000)
+    cube = DistinctCountCube(df)
+    all_territories = ['EMEA', np.nan, 'APAC', 'Japan']
+    for start, end, filters in [
+        (None, None, None),
+        ('2003-07-01', '2004-09-30', {'PRODUCTLINE': PRODUCT_LINES[:3], 'TERRITORY': all_territories}),
+        ('2003-07-12', '2004-02-17', {'TERRITORY': [np.nan, 'Japan'], 'DEALSIZE': ['Small']})
+    ]:
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df['ORDERDATE'].between(start, end)
+        for col, values in (filters or {}).items():
+            mask &= df[col].isin(values)
+        selected = df[mask]
+        assert cube.count_distinct(start, end, filters) == selected['CUSTOMERNAME'].nunique()
+        by_country = cube.count_distinct_by('COUNTRY', start, end, filters)
+        expected = selected.groupby('COUNTRY')['CUSTOMERNAME'].nunique()
+        assert by_country.to_dict() == expected[expected > 0].to_dict()
+
+
+def test_query_cost_does_not_grow_with_rows():
+    # The dashboard's default filter state (every value allowed) and a product line filter
+    queries = [
+        ('2003-03-05', '2005-04-20', {'PRODUCTLINE': PRODUCT_LINES, 'DEALSIZE': ['Small', 'Medium', 'Large']}),
+        ('2003-07-01', '2004-09-30', {'PRODUCTLINE': PRODUCT_LINES[:3]})
+    ]
+    df = sales_frame(1000000, seed=1)
+    small, large = DistinctCountCube(sales_frame(100000)), DistinctCountCube(df)
+    for start, end, filters in queries:
+        assert large.merge_size(start, end, filters) <= small.merge_size(start, end, filters)
+        mask = df['ORDERDATE'].between(start, end) & df['PRODUCTLINE'].isin(filters['PRODUCTLINE'])
+        exact = df.loc[mask, 'CUSTOMERNAME'].nunique()
+        assert abs(large.count_distinct(start, end, filters) / exact - 1) < 0.05
+
+
+if __name__ == "__main__":
+    test_distinct_counts_are_exact_on_small_data()
+    test_query_cost_does_not_grow_with_rows()
+    print("Distinct count cube tests passed")
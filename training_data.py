@@ -0,0 +1,58 @@
+"""
+Training Data Container
+Feature matrices materialized once as contiguous arrays and shared by every model fit
+"""
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+# Every model trains and predicts on this dtype; the tree learners work in float32 internally anyway
+FEATURE_DTYPE = np.float32
+
+
+def as_feature_matrix(X, dtype=FEATURE_DTYPE):
+    """C-contiguous array of X in the feature dtype, without copying when X already is one"""
+    if hasattr(X, 'to_numpy'):
+        X = X.to_numpy(dtype=dtype, copy=False)
+    return np.ascontiguousarray(X, dtype=dtype)
+
+
+class TrainingData:
+    """Features and target of one training run, converted once.
+
+    X is stored as a contiguous float32 matrix and split into train/test rows once (the same
+    rows train_test_split picks for the same random_state). fit_scaler computes the scaled
+    copies once, so all models receive the same buffers instead of converting pandas frames
+    themselves. test_size=None keeps all rows for training.
+    """
+    def __init__(self, X, y, test_size=0.2, random_state=42, dtype=FEATURE_DTYPE):
+        self.feature_names = list(X.columns) if hasattr(X, 'columns') else None
+        self.X = as_feature_matrix(X, dtype)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.scaler = None
+        self.X_train_scaled = None
+        self.X_test_scaled = None
+
+        if test_size:
+            train_idx, test_idx = train_test_split(np.arange(len(self.X)), test_size=test_size, random_state=random_state)
+            self.X_train, self.X_test = self.X[train_idx], self.X[test_idx]
+            self.y_train, self.y_test = self.y[train_idx], self.y[test_idx]
+        else:
+            self.X_train, self.X_test = self.X, None
+            self.y_train, self.y_test = self.y, None
+
+    def fit_scaler(self, scaler):
+        """Fit scaler on the training rows and cache the scaled train and test matrices"""
+        self.scaler = scaler.fit(self.X_train)
+        self.X_train_scaled = self._scale(self.X_train)
+        self.X_test_scaled = self._scale(self.X_test) if self.X_test is not None else None
+        return self.scaler
+
+    def _scale(self, X):
+        return np.ascontiguousarray(self.scaler.transform(X), dtype=X.dtype)
+
+    def nbytes(self):
+        """Memory held by the feature matrices, including the cached scaled copies"""
+        arrays = [self.X, self.X_train, self.X_test, self.X_train_scaled, self.X_test_scaled]
+        # Without a split the train matrix is X itself
+        return sum(a.nbytes for a in arrays if a is not None) - (self.X.nbytes if self.X_train is self.X else 0)
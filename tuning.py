@@ -0,0 +1,200 @@
+"""
+Hyperparameter Tuning Engine
+Successive-halving random search with parallel CV folds and early stopping for boosted models
+"""
+
+import math
+import time
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.stats import randint, uniform, loguniform
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, ParameterSampler, train_test_split
+import xgboost as xgb
+import warnings
+warnings.filterwarnings('ignore')
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+
+# Boosting rounds stop once the inner validation score has not improved for this many rounds
+EARLY_STOPPING_ROUNDS = 20
+# Share of each training fold held out to drive early stopping
+VALIDATION_FRACTION = 0.1
+
+# Dashboard labels mapped to ModelManager model names
+TUNING_ALIASES = {
+    'Random Forest': 'Random_Forest',
+    'Gradient Boosting': 'Gradient_Boosting'
+}
+
+SEARCH_SPACES = {
+    'Random_Forest': {
+        'n_estimators': randint(50, 400),
+        'max_depth': [None, 8, 12, 16, 24],
+        'min_samples_leaf': randint(1, 10),
+        'max_features': [1.0, 0.7, 0.5, 'sqrt']
+    },
+    'Gradient_Boosting': {
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_depth': randint(2, 7),
+        'subsample': uniform(0.6, 0.4),
+        'min_samples_leaf': randint(1, 20)
+    },
+    'XGBoost': {
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_depth': randint(3, 10),
+        'subsample': uniform(0.6, 0.4),
+        'colsample_bytree': uniform(0.6, 0.4),
+        'min_child_weight': loguniform(1, 20),
+        'reg_lambda': loguniform(0.1, 10)
+    },
+    'LightGBM': {
+        'learning_rate': loguniform(0.01, 0.3),
+        'num_leaves': randint(15, 128),
+        'min_child_samples': randint(5, 60),
+        'subsample': uniform(0.6, 0.4),
+        'subsample_freq': [1],
+        'colsample_bytree': uniform(0.6, 0.4),
+        'reg_lambda': loguniform(0.01, 10)
+    }
+}
+
+
+def build_estimator(model_name, params, n_jobs=1):
+    """Create a model of the given family; boosted models get room to stop early"""
+    if model_name == 'Random_Forest':
+        return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    if model_name == 'Gradient_Boosting':
+        # sklearn's GBM holds out validation_fraction itself and stops on n_iter_no_change
+        return GradientBoostingRegressor(n_estimators=1000, n_iter_no_change=EARLY_STOPPING_ROUNDS,
+                                         validation_fraction=VALIDATION_FRACTION, random_state=42, **params)
+    if model_name == 'XGBoost':
+        return xgb.XGBRegressor(n_estimators=1000, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                                random_state=42, n_jobs=n_jobs, **params)
+    if model_name == 'LightGBM' and LIGHTGBM_AVAILABLE:
+        return lgb.LGBMRegressor(n_estimators=1000, random_state=42, n_jobs=n_jobs, verbose=-1, **params)
+    raise ValueError(f"No tuning support for {model_name}")
+
+
+def fit_estimator(model_name, params, X, y, n_jobs=1):
+    """Fit one candidate, carving an early-stopping set out of X for XGBoost and LightGBM"""
+    model = build_estimator(model_name, params, n_jobs)
+    if model_name in ['XGBoost', 'LightGBM']:
+        X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=VALIDATION_FRACTION, random_state=42)
+        if model_name == 'XGBoost':
+            model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        else:
+            model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)],
+                      callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+    else:
+        model.fit(X, y)
+    return model
+
+
+def _score_fold(model_name, params, X, y, train_idx, test_idx):
+    model = fit_estimator(model_name, params, X[train_idx], y[train_idx])
+    return r2_score(y[test_idx], model.predict(X[test_idx]))
+
+
+class HyperparameterTuner:
+    """Random search narrowed by successive halving on the number of rows.
+
+    Every rung scores the surviving candidates with k-fold CV on a growing sample, running
+    the candidate/fold fits of one worker-sized batch of candidates in parallel, and keeps the
+    best 1/factor of them. time_budget (seconds) is checked between batches: once spent, no more
+    fits are started and the best candidate scored so far is refit on all rows. That final refit
+    is not bounded by the budget.
+    """
+    def __init__(self, model_name, n_candidates=27, factor=3, cv=3, time_budget=None, n_jobs=-1, random_state=42):
+        if model_name not in SEARCH_SPACES or (model_name == 'LightGBM' and not LIGHTGBM_AVAILABLE):
+            raise ValueError(f"No tuning support for {model_name}")
+        self.model_name = model_name
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.cv = cv
+        self.time_budget = time_budget
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.history = []
+
+    def _out_of_time(self, start):
+        return self.time_budget is not None and time.monotonic() - start >= self.time_budget
+
+    def tune(self, X, y, progress_callback=None):
+        """Search for the best parameters; progress_callback(done, total, step) is called after each rung"""
+        start = time.monotonic()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float64)
+        rng = np.random.RandomState(self.random_state)
+        order = rng.permutation(len(X))
+
+        # Plain Python values keep the reported parameters JSON-friendly
+        candidates = [{k: v.item() if isinstance(v, np.generic) else v for k, v in params.items()}
+                      for params in ParameterSampler(SEARCH_SPACES[self.model_name], n_iter=self.n_candidates,
+                                                     random_state=self.random_state)]
+        # Enough rungs to narrow the candidates down to one; the last rung uses every row
+        n_rungs = 1
+        while self.factor ** n_rungs < len(candidates):
+            n_rungs += 1
+        min_rows = max(len(X) // self.factor ** (n_rungs - 1), self.cv * 20)
+        folds = KFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+
+        # Candidates scored per batch, so the budget is checked every time the workers free up
+        batch_size = max(1, effective_n_jobs(self.n_jobs))
+        scores = None
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            for rung in range(n_rungs):
+                # The integer split can leave the last rung a few rows short; give it all of them
+                n_rows = len(X) if rung == n_rungs - 1 else min(len(X), min_rows * self.factor ** rung)
+                sample = order[:n_rows]
+                X_rung, y_rung = X[sample], y[sample]
+                splits = list(folds.split(X_rung))
+
+                rung_scores = []
+                for first in range(0, len(candidates), batch_size):
+                    # Rung 0 always scores its first batch so there is a candidate to refit
+                    if (rung_scores or rung > 0) and self._out_of_time(start):
+                        break
+                    batch = candidates[first:first + batch_size]
+                    fold_scores = parallel(
+                        delayed(_score_fold)(self.model_name, params, X_rung, y_rung, train_idx, test_idx)
+                        for params in batch for train_idx, test_idx in splits
+                    )
+                    rung_scores.extend(np.asarray(fold_scores).reshape(len(batch), len(splits)).mean(axis=1))
+                if not rung_scores:
+                    # Out of time before this rung started: keep the previous rung's ranking
+                    break
+                candidates, scores = candidates[:len(rung_scores)], np.asarray(rung_scores)
+                for params, score in zip(candidates, scores):
+                    self.history.append({'rung': rung, 'n_rows': n_rows, 'params': params, 'cv_r2': score})
+                print(f"Rung {rung}: {len(candidates)} candidates on {n_rows} rows, best CV R2 {scores.max():.4f}")
+                if progress_callback is not None:
+                    # The final refit counts as one more step
+                    progress_callback(rung + 1, n_rungs + 1, f"Rung {rung} ({n_rows} rows)")
+
+                ranked = np.argsort(scores)[::-1]
+                if len(candidates) == 1 or n_rows == len(X) or self._out_of_time(start):
+                    break
+                keep = ranked[:max(1, math.ceil(len(candidates) / self.factor))]
+                candidates = [candidates[i] for i in keep]
+                scores = scores[keep]
+
+        best = int(np.argmax(scores))
+        best_params = candidates[best]
+        estimator = fit_estimator(self.model_name, best_params, X, y, n_jobs=self.n_jobs)
+        if progress_callback is not None:
+            progress_callback(n_rungs + 1, n_rungs + 1, "Refit on all rows")
+
+        return {
+            'model_name': self.model_name,
+            'best_params': best_params,
+            'best_score': float(scores[best]),
+            'estimator': estimator,
+            'history': self.history,
+            'elapsed': time.monotonic() - start
+        }